@@ -51,3 +51,8 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
         return TokenData(user_id=user_id, email=email)
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+def verify_admin(token: TokenData = Depends(verify_token)) -> TokenData:
+    if token.email.lower() not in settings.admin_emails:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return token
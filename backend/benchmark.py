@@ -0,0 +1,294 @@
+"""Latency benchmarks for the matching engine.
+
+Usage: python benchmark.py {jobs,pdf,recruiter,pool,skills,startup,all} [--resumes N] [--runs N] [--workers N]
+
+Each benchmark prints its timings and exits non-zero when the tracked
+latency target is missed.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from jobalytics_matcher import get_matcher, ProfileMatrix, PROFILE_SETS
+from worker_pool import WorkerPool, build_profile, extract_pdf_text_parallel, analyze_job, analyze_jobs
+from parser import ResumeParser
+from deadline import Deadline
+from config import settings
+
+# p95 latency targets in milliseconds
+RECRUITER_TARGET_MS = 250
+STARTUP_TARGET_MS = 500
+
+
+def random_profile(rng: random.Random, size: int, domain: str = None) -> Dict:
+    """Synthetic profile with `size` keywords drawn from each vocabulary"""
+    vocabulary = get_matcher().vocabulary
+    profile = {'version': vocabulary.version, 'bits': {}, 'extra': {}}
+    for name in PROFILE_SETS:
+        words = vocabulary.lists[name]
+        picked = rng.sample(words, min(size, len(words)))
+        profile['bits'][name] = vocabulary.keyword_ids.encode(w.lower().replace('-', ' ') for w in picked)[0]
+    if domain:
+        profile['domain'] = domain
+    return profile
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    """Synthetic document mixing vocabulary keywords with filler words"""
+    filler = ["the", "team", "built", "and", "with", "for", "across", "systems", "delivered", "using"]
+    vocabulary = sorted(set(get_matcher().vocabulary.keywords))
+    return " ".join(rng.choice(vocabulary) if rng.random() < 0.2 else rng.choice(filler) for _ in range(words))
+
+
+def synthetic_pdf(pages: List[str], line_length: int = 90) -> bytes:
+    """Minimal single-column PDF with one text page per string"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        words, lines, line = text.split(), [], ""
+        for word in words:
+            if line and len(line) + len(word) >= line_length:
+                lines.append(line)
+                line = ""
+            line = f"{line} {word}" if line else word
+        lines.append(line)
+        escaped = [l.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for l in lines]
+        stream = ("BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({l}) Tj T*" for l in escaped) + " ET").encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       b"/Contents %d 0 R >>" % (len(objects)))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{k} 0 R" for k in kids).encode(), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def measure(fn: Callable, runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: List[float], target_ms: float) -> bool:
+    p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+    ok = p95 <= target_ms
+    print(f"{name}: median {statistics.median(timings):.1f} ms, p95 {p95:.1f} ms "
+          f"(target {target_ms} ms) {'OK' if ok else 'MISSED'}")
+    return ok
+
+
+def bench_recruiter(args) -> bool:
+    """Rank every stored resume against one job, as /api/jobs/{id}/matches does"""
+    rng = random.Random(0)
+    matcher = get_matcher()
+    resumes = [random_profile(rng, rng.randint(10, 80)) for _ in range(args.resumes)]
+    jobs = [random_profile(rng, rng.randint(5, 40), domain) for domain in ("swe", "pm_marketing", "general")]
+
+    def run():
+        matrix = ProfileMatrix(resumes, matcher.vocabulary.bitset_words)
+        for job in jobs:
+            matcher.rank_resumes(matrix, job, 10)
+
+    return report(f"recruiter ({args.resumes} resumes, 3 jobs)", measure(run, args.runs), RECRUITER_TARGET_MS)
+
+
+def bench_pool(args) -> bool:
+    """Profile-building throughput on threads vs the worker pool"""
+    rng = random.Random(0)
+    texts = [random_text(rng, 5000) for _ in range(args.workers * 8)]
+    version = get_matcher().version
+
+    async def run(pool: WorkerPool) -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*[pool.run(build_profile, text, version, size=len(text), deadline=Deadline(600)) for text in texts])
+        return len(texts) / (time.perf_counter() - start)
+
+    threads = WorkerPool(size=0, queue_depth=0, inline_size=0)
+    processes = WorkerPool(size=args.workers, queue_depth=len(texts), inline_size=0)
+    processes.start()
+    try:
+        # First round only warms up the workers
+        asyncio.run(run(processes))
+        thread_rate = asyncio.run(run(threads))
+        process_rate = asyncio.run(run(processes))
+    finally:
+        processes.shutdown()
+    print(f"pool ({len(texts)} documents): threads {thread_rate:.1f} docs/s, "
+          f"{args.workers} processes {process_rate:.1f} docs/s ({process_rate / thread_rate:.1f}x)")
+    return True
+
+
+def bench_pdf(args) -> bool:
+    """PDF text extraction by page count: sequential vs page ranges spread over the pool"""
+    rng = random.Random(0)
+    parser = ResumeParser()
+    pool = WorkerPool(size=args.workers, queue_depth=args.workers, inline_size=0)
+    pool.start()
+    try:
+        # First run only warms up the workers
+        warm_up = synthetic_pdf(["warm up"] * args.workers)
+        asyncio.run(extract_pdf_text_parallel(pool, warm_up, len(warm_up), args.workers, Deadline(600), 600))
+        for page_count in (1, 2, 4, 8, 16, 32):
+            content = synthetic_pdf([random_text(rng, 500) for _ in range(page_count)])
+
+            def parallel():
+                return asyncio.run(extract_pdf_text_parallel(pool, content, len(content), page_count, Deadline(600), 600))
+
+            assert parallel() == parser.parse_pdf(content)
+            runs = max(args.runs // 4, 2)
+            sequential_ms = statistics.median(measure(lambda: parser.parse_pdf(content), runs))
+            parallel_ms = statistics.median(measure(parallel, runs))
+            print(f"pdf ({page_count} pages, {len(content) // 1024} KiB): sequential {sequential_ms:.0f} ms, "
+                  f"{args.workers} processes {parallel_ms:.0f} ms ({sequential_ms / parallel_ms:.1f}x)")
+    finally:
+        pool.shutdown()
+    return True
+
+
+def bench_jobs(args) -> bool:
+    """Job feed analysis throughput on the pool: one task per job vs one task per feed batch"""
+    rng = random.Random(0)
+    texts = [random_text(rng, 300) for _ in range(args.workers * 500)]
+    version = get_matcher().version
+    batch_size = settings.job_feed_batch_size
+    pool = WorkerPool(size=args.workers, queue_depth=len(texts), inline_size=0)
+    pool.start()
+
+    async def per_job() -> List[Dict]:
+        return await asyncio.gather(*[pool.run(analyze_job, text, version, size=len(text), deadline=Deadline(600))
+                                      for text in texts])
+
+    async def batched() -> List[Dict]:
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        results = await asyncio.gather(*[pool.run(analyze_jobs, batch, version, size=1, deadline=Deadline(600))
+                                         for batch in batches])
+        return [analysis for batch in results for analysis in batch]
+
+    try:
+        # First round only warms up the workers
+        asyncio.run(batched())
+        ok = asyncio.run(per_job()) == asyncio.run(batched())
+        runs = max(args.runs // 4, 2)
+        per_job_ms = statistics.median(measure(lambda: asyncio.run(per_job()), runs))
+        batched_ms = statistics.median(measure(lambda: asyncio.run(batched()), runs))
+    finally:
+        pool.shutdown()
+    print(f"jobs ({len(texts)} descriptions, {args.workers} processes): task per job {len(texts) / per_job_ms * 1000:.0f} jobs/s, "
+          f"batches of {batch_size} {len(texts) / batched_ms * 1000:.0f} jobs/s ({per_job_ms / batched_ms:.1f}x)")
+    if not ok:
+        print("jobs: batched results differ from one task per job")
+    return ok
+
+
+def extract_skills_per_pattern(text: str) -> List[str]:
+    """ResumeParser.extract_skills as it was: one regex search per skill"""
+    text_lower = re.sub(r'[^\w\s.#+/-]', ' ', text.lower())
+    return [
+        skill for skill in ResumeParser.SKILLS
+        if re.search(r'\b' + skill.replace('.', r'\.').replace('+', r'\+') + r'\b', text_lower)
+    ]
+
+
+def bench_skills(args) -> bool:
+    """extract_skills on resume- and job-sized texts: one automaton pass vs a regex per skill"""
+    rng = random.Random(0)
+    parser = ResumeParser()
+    skills = ResumeParser.SKILLS
+    ok = True
+    for words in (300, 1000, 5000):
+        filler = ["the", "team", "built", "and", "with", "for", "c", "systems", "node", "using"]
+        texts = [" ".join(rng.choice(skills) if rng.random() < 0.1 else rng.choice(filler) for _ in range(words))
+                 for _ in range(20)]
+        ok = ok and all(parser.extract_skills(text) == extract_skills_per_pattern(text) for text in texts)
+        regex_ms = statistics.median(measure(lambda: [extract_skills_per_pattern(text) for text in texts], args.runs)) / len(texts)
+        automaton_ms = statistics.median(measure(lambda: [parser.extract_skills(text) for text in texts], args.runs)) / len(texts)
+        print(f"skills ({words} words): regex per skill {regex_ms:.2f} ms, one pass {automaton_ms:.2f} ms "
+              f"({regex_ms / automaton_ms:.1f}x)")
+    if not ok:
+        print("skills: results differ from the regex per skill")
+    return ok
+
+
+# Child process timing one cold matcher start and reporting its peak RSS
+_STARTUP_PROBE = """
+import time
+start = time.perf_counter()
+from jobalytics_matcher import get_matcher
+get_matcher()
+elapsed = (time.perf_counter() - start) * 1000
+with open("/proc/self/status") as status:
+    peak_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+print(elapsed, peak_kb // 1024)
+"""
+
+
+def bench_startup(args) -> bool:
+    """Cold start and RSS of a fresh worker, with and without the compiled artifact"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as empty_dir, tempfile.TemporaryDirectory() as artifact_dir:
+        subprocess.run([sys.executable, "vocabulary_artifact.py"], cwd=backend_dir, check=True, capture_output=True,
+                       env=dict(os.environ, VOCABULARY_ARTIFACT_DIR=artifact_dir, LOG_LEVEL="WARNING"))
+        results = {}
+        for label, path in (("compiled in-process", empty_dir), ("artifact", artifact_dir)):
+            timings, rss = [], 0
+            for _ in range(max(args.runs // 4, 2)):
+                # The probe writes its compiled artifact, so the cold case starts from an empty dir each run
+                for name in os.listdir(empty_dir):
+                    os.remove(os.path.join(empty_dir, name))
+                env = dict(os.environ, VOCABULARY_ARTIFACT_DIR=path, LOG_LEVEL="WARNING")
+                out = subprocess.run([sys.executable, "-c", _STARTUP_PROBE], env=env, check=True,
+                                     capture_output=True, text=True, cwd=backend_dir)
+                elapsed, rss = out.stdout.split()
+                timings.append(float(elapsed))
+            results[label] = (timings, int(rss))
+
+    for label, (timings, rss) in results.items():
+        print(f"startup, {label}: median {statistics.median(timings):.0f} ms, peak RSS {rss} MiB")
+    return report("startup with artifact", results["artifact"][0], STARTUP_TARGET_MS)
+
+
+BENCHMARKS = {
+    "jobs": bench_jobs,
+    "pdf": bench_pdf,
+    "recruiter": bench_recruiter,
+    "pool": bench_pool,
+    "skills": bench_skills,
+    "startup": bench_startup,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--resumes", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    names = sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    results = [BENCHMARKS[name](args) for name in names]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
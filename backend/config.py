@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 class Settings:
     # Database
@@ -22,11 +23,63 @@ class Settings:
     # File Upload
     max_file_size_mb: int = int(os.getenv("MAX_FILE_SIZE_MB", "10"))
     max_file_size_bytes: int = max_file_size_mb * 1024 * 1024
+    # Where uploads are spooled while they are parsed (system temp dir when unset)
+    upload_spool_dir: Optional[str] = os.getenv("UPLOAD_SPOOL_DIR") or None
     allowed_file_types: list = ["application/pdf"]
     
+    # Bulk resume import
+    max_archive_size_mb: int = int(os.getenv("MAX_ARCHIVE_SIZE_MB", "500"))
+    max_archive_size_bytes: int = max_archive_size_mb * 1024 * 1024
+    max_bulk_files: int = int(os.getenv("MAX_BULK_FILES", "1000"))
+    bulk_insert_batch_size: int = int(os.getenv("BULK_INSERT_BATCH_SIZE", "50"))
+    
+    # Bulk job feed ingestion (JSONL/CSV)
+    max_job_feed_size_mb: int = int(os.getenv("MAX_JOB_FEED_SIZE_MB", "1024"))
+    max_job_feed_size_bytes: int = max_job_feed_size_mb * 1024 * 1024
+    # Jobs analyzed in one worker task and stored in one transaction
+    job_feed_batch_size: int = int(os.getenv("JOB_FEED_BATCH_SIZE", "500"))
+    job_feed_batch_timeout_seconds: int = int(os.getenv("JOB_FEED_BATCH_TIMEOUT_SECONDS", "120"))
+    
     # API
     api_timeout_seconds: int = int(os.getenv("API_TIMEOUT_SECONDS", "30"))
     max_jobs_per_request: int = int(os.getenv("MAX_JOBS_PER_REQUEST", "50"))
+    max_resumes_per_request: int = int(os.getenv("MAX_RESUMES_PER_REQUEST", "50"))
+    max_jobs_scored: int = int(os.getenv("MAX_JOBS_SCORED", "20000"))
+    max_resumes_scored: int = int(os.getenv("MAX_RESUMES_SCORED", "20000"))
+    profile_rebuild_batch_size: int = int(os.getenv("PROFILE_REBUILD_BATCH_SIZE", "200"))
+    job_index_max_users: int = int(os.getenv("JOB_INDEX_MAX_USERS", "1000"))
+    
+    # Worker processes for parsing and keyword extraction (0 runs everything on threads)
+    worker_pool_size: int = int(os.getenv("WORKER_POOL_SIZE", str(os.cpu_count() or 1)))
+    worker_pool_queue_depth: int = int(os.getenv("WORKER_POOL_QUEUE_DEPTH", "64"))
+    worker_pool_inline_size: int = int(os.getenv("WORKER_POOL_INLINE_SIZE", "8192"))
+    # PDF text extraction: "auto" (pdfium, pdfplumber for pages that look garbled), "pdfium" or "pdfplumber"
+    pdf_backend: str = os.getenv("PDF_BACKEND", "auto")
+    # PDFs with at least this many pages are extracted in page ranges across the workers
+    pdf_parallel_min_pages: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "6"))
+    # Extraction time allowed per page before a page range is stopped
+    pdf_page_budget_seconds: float = float(os.getenv("PDF_PAGE_BUDGET_SECONDS", "5"))
+    
+    # Queued resume ingestion (upload with ?async=true), processed by `python ingestion_worker.py`
+    ingestion_poll_seconds: float = float(os.getenv("INGESTION_POLL_SECONDS", "1"))
+    ingestion_timeout_seconds: int = int(os.getenv("INGESTION_TIMEOUT_SECONDS", "120"))
+    # A claimed task not finished within this long (its worker died) is handed out again
+    ingestion_lease_seconds: int = int(os.getenv("INGESTION_LEASE_SECONDS", "300"))
+    ingestion_max_attempts: int = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+    
+    # Match result cache
+    match_cache_max_entries: int = int(os.getenv("MATCH_CACHE_MAX_ENTRIES", "10000"))
+    match_cache_max_mb: int = int(os.getenv("MATCH_CACHE_MAX_MB", "64"))
+    match_cache_ttl_seconds: int = int(os.getenv("MATCH_CACHE_TTL_SECONDS", "86400"))
+    match_cache_persistent: bool = os.getenv("MATCH_CACHE_PERSISTENT", "false").lower() == "true"
+    
+    # Compiled vocabulary artifacts (one file per version), built by `python vocabulary_artifact.py`
+    vocabulary_artifact_dir: str = os.getenv("VOCABULARY_ARTIFACT_DIR", os.path.dirname(os.path.abspath(__file__)))
+    # How often workers check whether another worker reloaded the vocabulary
+    vocabulary_poll_seconds: int = int(os.getenv("VOCABULARY_POLL_SECONDS", "10"))
+    # Comma-separated emails allowed to call the admin endpoints
+    _admin_emails_str: str = os.getenv("ADMIN_EMAILS", "")
+    admin_emails: list = [email.strip().lower() for email in _admin_emails_str.split(",") if email.strip()]
     
     # Environment
     environment: str = os.getenv("ENVIRONMENT", "development")
@@ -1,12 +1,21 @@
 import psycopg2
 from psycopg2.pool import ThreadedConnectionPool
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+import csv
+import io
 import json
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from contextlib import contextmanager
 from config import settings
 from logger import logger
 
+def _csv_rows(rows) -> io.StringIO:
+    """Rows as COPY ... FORMAT csv input; None and empty strings both become NULL unless FORCE_NOT_NULL names the column"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    buffer.seek(0)
+    return buffer
+
 class DatabasePool:
     _instance = None
     _pool = None
@@ -154,12 +163,93 @@ def init_db():
             )
         """)
         
+        # Keyword profiles computed at upload, stamped with the vocabulary version
+        cur.execute("ALTER TABLE resumes ADD COLUMN IF NOT EXISTS keyword_profile TEXT")
+        cur.execute("ALTER TABLE resumes ADD COLUMN IF NOT EXISTS profile_version TEXT")
+        cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS domain TEXT")
+        cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS keyword_profile TEXT")
+        cur.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS profile_version TEXT")
+        
+        # Uploads are content-addressed: one user's re-upload returns the existing resume,
+        # and an identical PDF from anyone reuses the parse output
+        cur.execute("ALTER TABLE resumes ADD COLUMN IF NOT EXISTS content_hash TEXT")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS parsed_resumes (
+                content_hash TEXT NOT NULL,
+                parser_version TEXT NOT NULL,
+                parsed TEXT NOT NULL,
+                keyword_profile TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (content_hash, parser_version)
+            )
+        """)
+        
+        # How far each bulk job feed has been ingested, for resuming it
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS job_feed_checkpoints (
+                user_id INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                records_done INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, source),
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+        """)
+        
+        # Queued uploads, claimed by ingestion workers with FOR UPDATE SKIP LOCKED
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS ingestion_tasks (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                content BYTEA,
+                content_hash TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                resume_id INTEGER,
+                result TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+        """)
+        
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS match_cache (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS vocabulary_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
         cur.execute("CREATE INDEX IF NOT EXISTS idx_resume_user ON resumes(user_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_job_user ON jobs(user_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_resume_skills ON resume_skills(resume_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_job_skills ON job_skills(job_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_match_results ON match_results(resume_id, job_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
+        # One resume per user and PDF. Copies stored by racing uploads before
+        # the index existed keep their text but lose the hash.
+        cur.execute("SELECT to_regclass('idx_resume_content_unique')")
+        if cur.fetchone()[0] is None:
+            cur.execute("""
+                UPDATE resumes r SET content_hash = NULL
+                WHERE content_hash IS NOT NULL AND EXISTS (
+                    SELECT 1 FROM resumes o WHERE o.user_id = r.user_id AND o.content_hash = r.content_hash AND o.id < r.id
+                )
+            """)
+            cur.execute("DROP INDEX IF EXISTS idx_resume_content")
+            cur.execute("CREATE UNIQUE INDEX idx_resume_content_unique ON resumes(user_id, content_hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_ingestion_pending ON ingestion_tasks(id) WHERE status IN ('queued', 'processing')")
         
         conn.commit()
     finally:
@@ -187,14 +277,22 @@ class UserDB:
 class ResumeDB:
     @staticmethod
     def insert_resume(user_id: int, filename: str, text: str, embedding: Optional[List[float]], 
-                     skills: List[str], experience_years: float, education: str) -> int:
+                     skills: List[str], experience_years: float, education: str,
+                     keyword_profile: Optional[Dict] = None, content_hash: Optional[str] = None) -> Optional[int]:
+        """Id of the new resume, or None when the user already has one with this content_hash"""
         with db_pool.get_connection() as conn:
             cur = conn.cursor()
             cur.execute(
-                "INSERT INTO resumes (user_id, filename, text, embedding, experience_years, education) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id",
-                (user_id, filename, text, json.dumps(embedding) if embedding else None, experience_years, education)
+                "INSERT INTO resumes (user_id, filename, text, embedding, experience_years, education, keyword_profile, profile_version, content_hash) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                "ON CONFLICT (user_id, content_hash) DO NOTHING RETURNING id",
+                (user_id, filename, text, json.dumps(embedding) if embedding else None, experience_years, education,
+                 json.dumps(keyword_profile) if keyword_profile else None,
+                 keyword_profile['version'] if keyword_profile else None, content_hash)
             )
-            resume_id = cur.fetchone()[0]
+            row = cur.fetchone()
+            if row is None:
+                return None
+            resume_id = row[0]
             
             for skill in skills:
                 cur.execute("INSERT INTO resume_skills (resume_id, skill) VALUES (%s, %s)", (resume_id, skill))
@@ -202,6 +300,40 @@ class ResumeDB:
             logger.info(f"Resume {resume_id} inserted for user {user_id}")
             return resume_id
     
+    @staticmethod
+    def insert_resumes(user_id: int, resumes: List[Dict]) -> Dict[str, int]:
+        """Insert a batch of resumes and their skills in one transaction, with one
+        multi-row INSERT per table. Each resume has insert_resume's fields and a
+        distinct content_hash; returns the new ids by content hash. Hashes the
+        user already has are skipped and missing from the result."""
+        if not resumes:
+            return {}
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            rows = execute_values(
+                cur,
+                "INSERT INTO resumes (user_id, filename, text, experience_years, education, keyword_profile, profile_version, content_hash) VALUES %s "
+                "ON CONFLICT (user_id, content_hash) DO NOTHING RETURNING id, content_hash",
+                [(user_id, resume['filename'], resume['text'], resume['experience_years'], resume['education'],
+                  json.dumps(resume['keyword_profile']) if resume['keyword_profile'] else None,
+                  resume['keyword_profile']['version'] if resume['keyword_profile'] else None, resume['content_hash'])
+                 for resume in resumes],
+                page_size=len(resumes),
+                fetch=True
+            )
+            ids = {content_hash: resume_id for resume_id, content_hash in rows}
+            
+            execute_values(
+                cur,
+                "INSERT INTO resume_skills (resume_id, skill) VALUES %s",
+                [(ids[resume['content_hash']], skill) for resume in resumes if resume['content_hash'] in ids
+                 for skill in resume['skills']],
+                page_size=1000
+            )
+            
+            logger.info(f"{len(ids)} resumes inserted for user {user_id}")
+            return ids
+    
     @staticmethod
     def get_resume(resume_id: int, user_id: int) -> Optional[Dict]:
         with db_pool.get_connection() as conn:
@@ -224,6 +356,97 @@ class ResumeDB:
                 result['embedding'] = json.loads(result['embedding'])
             return result
     
+    @staticmethod
+    def get_resume_by_content(user_id: int, content_hash: str) -> Optional[Dict]:
+        """The user's resume uploaded from the same PDF, with its skills, in one query"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(
+                "SELECT r.id, r.filename, r.text, r.experience_years, r.education, "
+                "COALESCE(array_agg(s.skill) FILTER (WHERE s.skill IS NOT NULL), '{}') AS skills "
+                "FROM resumes r LEFT JOIN resume_skills s ON s.resume_id = r.id "
+                "WHERE r.user_id = %s AND r.content_hash = %s GROUP BY r.id",
+                (user_id, content_hash)
+            )
+            resume = cur.fetchone()
+            return dict(resume) if resume else None
+    
+    @staticmethod
+    def find_resume_by_content(user_id: int, content_hash: str) -> Optional[int]:
+        """Id of the user's resume uploaded from the same PDF, if any"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT id FROM resumes WHERE user_id = %s AND content_hash = %s",
+                (user_id, content_hash)
+            )
+            row = cur.fetchone()
+            return row[0] if row else None
+    
+    @staticmethod
+    def get_resume_profile(resume_id: int, user_id: int) -> Optional[Dict]:
+        """Fetch a resume's keyword profile without loading its text"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(
+                "SELECT id, keyword_profile, profile_version FROM resumes WHERE id = %s AND user_id = %s",
+                (resume_id, user_id)
+            )
+            resume = cur.fetchone()
+            
+            if not resume:
+                return None
+            
+            result = dict(resume)
+            if result['keyword_profile']:
+                result['keyword_profile'] = json.loads(result['keyword_profile'])
+            return result
+    
+    @staticmethod
+    def get_resume_profiles(user_id: int, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Fetch resumes with their keyword profiles, without loading any text"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(
+                "SELECT id, filename, keyword_profile, profile_version FROM resumes WHERE user_id = %s ORDER BY created_at DESC LIMIT %s OFFSET %s",
+                (user_id, limit, offset)
+            )
+            resumes = [dict(r) for r in cur.fetchall()]
+            for resume in resumes:
+                if resume['keyword_profile']:
+                    resume['keyword_profile'] = json.loads(resume['keyword_profile'])
+            return resumes
+    
+    @staticmethod
+    def update_resume_profile(resume_id: int, user_id: int, keyword_profile: Dict):
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE resumes SET keyword_profile = %s, profile_version = %s WHERE id = %s AND user_id = %s",
+                (json.dumps(keyword_profile), keyword_profile['version'], resume_id, user_id)
+            )
+    
+    @staticmethod
+    def get_resume_texts(resume_ids: List[int], user_id: int) -> Dict[int, str]:
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT id, text FROM resumes WHERE id = ANY(%s) AND user_id = %s", (list(resume_ids), user_id))
+            return dict(cur.fetchall())
+    
+    @staticmethod
+    def update_resume_profiles(user_id: int, keyword_profiles: Dict[int, Dict]):
+        """Store rebuilt profiles of many resumes with one UPDATE"""
+        if not keyword_profiles:
+            return
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            execute_values(
+                cur,
+                "UPDATE resumes SET keyword_profile = v.profile, profile_version = v.version FROM (VALUES %s) AS v(id, user_id, profile, version) WHERE resumes.id = v.id AND resumes.user_id = v.user_id",
+                [(resume_id, user_id, json.dumps(profile), profile['version']) for resume_id, profile in keyword_profiles.items()],
+                page_size=len(keyword_profiles)
+            )
+    
     @staticmethod
     def list_resumes(user_id: int, limit: int = 100, offset: int = 0) -> List[Dict]:
         with db_pool.get_connection() as conn:
@@ -238,19 +461,30 @@ class ResumeDB:
     def delete_resume(resume_id: int, user_id: int):
         with db_pool.get_connection() as conn:
             cur = conn.cursor()
-            cur.execute("DELETE FROM resumes WHERE id = %s AND user_id = %s", (resume_id, user_id))
+            cur.execute("DELETE FROM resumes WHERE id = %s AND user_id = %s RETURNING content_hash", (resume_id, user_id))
+            row = cur.fetchone()
+            # Parse output nobody's resume refers to any more is not kept
+            if row and row[0]:
+                cur.execute(
+                    "DELETE FROM parsed_resumes WHERE content_hash = %s AND NOT EXISTS (SELECT 1 FROM resumes WHERE content_hash = %s)",
+                    (row[0], row[0])
+                )
             logger.info(f"Resume {resume_id} deleted by user {user_id}")
 
 class JobDB:
     @staticmethod
     def insert_job(user_id: int, title: str, company: str, description: str, url: Optional[str],
                    embedding: Optional[List[float]], required_skills: List[str], 
-                   experience_required: float, education_required: str) -> int:
+                   experience_required: float, education_required: str,
+                   keyword_profile: Optional[Dict] = None) -> int:
         with db_pool.get_connection() as conn:
             cur = conn.cursor()
             cur.execute(
-                "INSERT INTO jobs (user_id, title, company, description, url, embedding, experience_required, education_required) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id",
-                (user_id, title, company, description, url, json.dumps(embedding) if embedding else None, experience_required, education_required)
+                "INSERT INTO jobs (user_id, title, company, description, url, embedding, experience_required, education_required, domain, keyword_profile, profile_version) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id",
+                (user_id, title, company, description, url, json.dumps(embedding) if embedding else None, experience_required, education_required,
+                 keyword_profile['domain'] if keyword_profile else None,
+                 json.dumps(keyword_profile) if keyword_profile else None,
+                 keyword_profile['version'] if keyword_profile else None)
             )
             job_id = cur.fetchone()[0]
             
@@ -260,6 +494,56 @@ class JobDB:
             logger.info(f"Job {job_id} inserted for user {user_id}")
             return job_id
     
+    @staticmethod
+    def insert_jobs(user_id: int, jobs: List[Dict], source: Optional[str] = None, records_done: int = 0) -> List[int]:
+        """Insert a batch of jobs and their required skills in one transaction with COPY.
+        
+        Ids are drawn from the jobs sequence up front so the skill rows can be
+        copied with them. With a source, the feed's checkpoint moves to
+        records_done in the same transaction, so a resumed feed neither skips
+        nor repeats jobs.
+        """
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            job_ids = []
+            if jobs:
+                cur.execute("SELECT nextval(pg_get_serial_sequence('jobs', 'id')) FROM generate_series(1, %s)", (len(jobs),))
+                job_ids = [row[0] for row in cur.fetchall()]
+                cur.copy_expert(
+                    "COPY jobs (id, user_id, title, company, description, url, experience_required, education_required, domain, keyword_profile, profile_version) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (title, company, description))",
+                    _csv_rows(
+                        (job_id, user_id, job['title'], job['company'], job['description'], job['url'],
+                         job['experience_required'], job['education_required'], job['keyword_profile']['domain'],
+                         json.dumps(job['keyword_profile']), job['keyword_profile']['version'])
+                        for job_id, job in zip(job_ids, jobs)
+                    )
+                )
+                cur.copy_expert(
+                    "COPY job_skills (job_id, skill) FROM STDIN WITH (FORMAT csv)",
+                    _csv_rows((job_id, skill) for job_id, job in zip(job_ids, jobs) for skill in job['required_skills'])
+                )
+            
+            if source:
+                cur.execute(
+                    "INSERT INTO job_feed_checkpoints (user_id, source, records_done) VALUES (%s, %s, %s) ON CONFLICT (user_id, source) DO UPDATE SET records_done = EXCLUDED.records_done, updated_at = CURRENT_TIMESTAMP",
+                    (user_id, source, records_done)
+                )
+            
+            logger.info(f"{len(job_ids)} jobs inserted for user {user_id}")
+            return job_ids
+    
+    @staticmethod
+    def get_feed_checkpoint(user_id: int, source: str) -> int:
+        """Records of a job feed already ingested"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT records_done FROM job_feed_checkpoints WHERE user_id = %s AND source = %s",
+                (user_id, source)
+            )
+            row = cur.fetchone()
+            return row[0] if row else 0
+    
     @staticmethod
     def get_job(job_id: int, user_id: int) -> Optional[Dict]:
         with db_pool.get_connection() as conn:
@@ -282,6 +566,25 @@ class JobDB:
                 result['embedding'] = json.loads(result['embedding'])
             return result
     
+    @staticmethod
+    def get_job_profile(job_id: int, user_id: int) -> Optional[Dict]:
+        """Fetch a job's keyword profile without loading its description"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(
+                "SELECT id, title, company, domain, keyword_profile, profile_version FROM jobs WHERE id = %s AND user_id = %s",
+                (job_id, user_id)
+            )
+            job = cur.fetchone()
+            
+            if not job:
+                return None
+            
+            result = dict(job)
+            if result['keyword_profile']:
+                result['keyword_profile'] = json.loads(result['keyword_profile'])
+            return result
+    
     @staticmethod
     def get_all_jobs(user_id: int, limit: int = 50, offset: int = 0) -> List[Dict]:
         with db_pool.get_connection() as conn:
@@ -293,6 +596,60 @@ class JobDB:
             job_ids = [row['id'] for row in cur.fetchall()]
             return [JobDB.get_job(job_id, user_id) for job_id in job_ids]
     
+    @staticmethod
+    def get_job_profiles(user_id: int, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Fetch jobs with their keyword profiles and a description preview, in one query"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(
+                "SELECT id, title, company, LEFT(description, 200) AS description, url, domain, keyword_profile, profile_version FROM jobs WHERE user_id = %s ORDER BY created_at DESC LIMIT %s OFFSET %s",
+                (user_id, limit, offset)
+            )
+            jobs = [dict(j) for j in cur.fetchall()]
+            for job in jobs:
+                if job['keyword_profile']:
+                    job['keyword_profile'] = json.loads(job['keyword_profile'])
+            return jobs
+    
+    @staticmethod
+    def get_jobs_fingerprint(user_id: int) -> Tuple[int, int]:
+        """(job count, sum of job ids) - changes whenever a job is added or deleted"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT COUNT(*), COALESCE(SUM(id), 0) FROM jobs WHERE user_id = %s", (user_id,))
+            count, id_sum = cur.fetchone()
+            return int(count), int(id_sum)
+    
+    @staticmethod
+    def update_job_profile(job_id: int, user_id: int, keyword_profile: Dict):
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE jobs SET domain = %s, keyword_profile = %s, profile_version = %s WHERE id = %s AND user_id = %s",
+                (keyword_profile['domain'], json.dumps(keyword_profile), keyword_profile['version'], job_id, user_id)
+            )
+    
+    @staticmethod
+    def get_job_descriptions(job_ids: List[int], user_id: int) -> Dict[int, str]:
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT id, description FROM jobs WHERE id = ANY(%s) AND user_id = %s", (list(job_ids), user_id))
+            return dict(cur.fetchall())
+    
+    @staticmethod
+    def update_job_profiles(user_id: int, keyword_profiles: Dict[int, Dict]):
+        """Store rebuilt profiles of many jobs with one UPDATE"""
+        if not keyword_profiles:
+            return
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            execute_values(
+                cur,
+                "UPDATE jobs SET domain = v.domain, keyword_profile = v.profile, profile_version = v.version FROM (VALUES %s) AS v(id, user_id, domain, profile, version) WHERE jobs.id = v.id AND jobs.user_id = v.user_id",
+                [(job_id, user_id, profile['domain'], json.dumps(profile), profile['version']) for job_id, profile in keyword_profiles.items()],
+                page_size=len(keyword_profiles)
+            )
+    
     @staticmethod
     def list_jobs(user_id: int, limit: int = 100, offset: int = 0) -> List[Dict]:
         with db_pool.get_connection() as conn:
@@ -338,3 +695,173 @@ class MatchDB:
                            (match_id, skill, False))
             
             return match_id
+
+class ParsedResumeDB:
+    """Parse output and keyword profile of PDFs by content hash"""
+    
+    @staticmethod
+    def get(content_hash: str, parser_version: str) -> Optional[Dict]:
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT parsed, keyword_profile FROM parsed_resumes WHERE content_hash = %s AND parser_version = %s",
+                (content_hash, parser_version)
+            )
+            row = cur.fetchone()
+            if not row:
+                return None
+            return {
+                'parsed': json.loads(row[0]),
+                'keyword_profile': json.loads(row[1]) if row[1] else None
+            }
+    
+    @staticmethod
+    def put(content_hash: str, parser_version: str, parsed: Dict, keyword_profile: Optional[Dict]):
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO parsed_resumes (content_hash, parser_version, parsed, keyword_profile) VALUES (%s, %s, %s, %s) "
+                "ON CONFLICT (content_hash, parser_version) DO UPDATE SET parsed = EXCLUDED.parsed, keyword_profile = EXCLUDED.keyword_profile",
+                (content_hash, parser_version, json.dumps(parsed), json.dumps(keyword_profile) if keyword_profile else None)
+            )
+
+class IngestionDB:
+    @staticmethod
+    def enqueue(user_id: int, filename: str, content: bytes, content_hash: str) -> int:
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO ingestion_tasks (user_id, filename, content, content_hash) VALUES (%s, %s, %s, %s) RETURNING id",
+                (user_id, filename, psycopg2.Binary(content), content_hash)
+            )
+            return cur.fetchone()[0]
+    
+    @staticmethod
+    def claim(lease_seconds: int) -> Optional[Dict]:
+        """Take the oldest queued task, or one whose worker has not reported back within the lease.
+        
+        SKIP LOCKED lets any number of workers claim concurrently without
+        waiting on each other or taking the same task.
+        """
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(
+                """
+                UPDATE ingestion_tasks SET status = 'processing', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE id = (
+                    SELECT id FROM ingestion_tasks
+                    WHERE status = 'queued'
+                       OR (status = 'processing' AND updated_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 second')
+                    ORDER BY id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, user_id, filename, content, content_hash, attempts
+                """,
+                (lease_seconds,)
+            )
+            task = cur.fetchone()
+            if not task:
+                return None
+            result = dict(task)
+            result['content'] = bytes(result['content']) if result['content'] is not None else None
+            return result
+    
+    @staticmethod
+    def complete(task_id: int, resume_id: int, result: Dict):
+        """Record a task's outcome; the PDF is not kept once it is parsed"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE ingestion_tasks SET status = 'done', resume_id = %s, result = %s, error = NULL, content = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                (resume_id, json.dumps(result), task_id)
+            )
+    
+    @staticmethod
+    def fail(task_id: int, error: str, retry: bool):
+        """Record a failed attempt: requeue the task, or give up on it and drop the PDF"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            if retry:
+                cur.execute(
+                    "UPDATE ingestion_tasks SET status = 'queued', error = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                    (error, task_id)
+                )
+            else:
+                cur.execute(
+                    "UPDATE ingestion_tasks SET status = 'failed', error = %s, content = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                    (error, task_id)
+                )
+    
+    @staticmethod
+    def get_task(task_id: int, user_id: int) -> Optional[Dict]:
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(
+                "SELECT id, filename, status, attempts, resume_id, result, error, created_at, updated_at FROM ingestion_tasks WHERE id = %s AND user_id = %s",
+                (task_id, user_id)
+            )
+            task = cur.fetchone()
+            if not task:
+                return None
+            result = dict(task)
+            if result['result']:
+                result['result'] = json.loads(result['result'])
+            return result
+
+class MatchCacheDB:
+    @staticmethod
+    def get(key: str, ttl_seconds: int) -> Optional[Dict]:
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT result FROM match_cache WHERE key = %s AND created_at > CURRENT_TIMESTAMP - %s * INTERVAL '1 second'",
+                (key, ttl_seconds)
+            )
+            row = cur.fetchone()
+            return json.loads(row[0]) if row else None
+    
+    @staticmethod
+    def put(key: str, result: Dict):
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO match_cache (key, result) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET result = EXCLUDED.result, created_at = CURRENT_TIMESTAMP",
+                (key, json.dumps(result))
+            )
+    
+    @staticmethod
+    def purge_expired(ttl_seconds: int) -> int:
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "DELETE FROM match_cache WHERE created_at <= CURRENT_TIMESTAMP - %s * INTERVAL '1 second'",
+                (ttl_seconds,)
+            )
+            return cur.rowcount
+    
+    @staticmethod
+    def purge_other_versions(version: str) -> int:
+        """Delete results computed with any vocabulary version but the given one"""
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM match_cache WHERE key NOT LIKE %s", (f"{version}:%",))
+            return cur.rowcount
+
+class VocabularyDB:
+    @staticmethod
+    def get_version() -> Optional[str]:
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT version FROM vocabulary_state WHERE id = 1")
+            row = cur.fetchone()
+            return row[0] if row else None
+    
+    @staticmethod
+    def set_version(version: str):
+        with db_pool.get_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO vocabulary_state (id, version) VALUES (1, %s) ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version, updated_at = CURRENT_TIMESTAMP",
+                (version,)
+            )
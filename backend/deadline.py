@@ -0,0 +1,60 @@
+import asyncio
+import time
+from typing import Optional, Sequence
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised inside matcher or parser work once its request is out of time or abandoned"""
+
+
+# Shared flags that let the API process cancel tasks running in worker processes
+_cancel_flags: Optional[Sequence[int]] = None
+
+
+def set_cancel_flags(flags: Sequence[int]):
+    global _cancel_flags
+    _cancel_flags = flags
+
+
+class Deadline:
+    """Time budget of one request, checked between stages of CPU-bound work.
+
+    Python threads and pool workers cannot be interrupted, so long-running
+    code calls ``check`` at safe points (between vocabularies, between PDF
+    pages) and stops with DeadlineExceeded once the budget is spent or the
+    caller cancelled. Deadlines are picklable and use the system-wide
+    monotonic clock, so they keep working when the task runs in a worker
+    process; cancellation then goes through the shared flag at ``slot``.
+    """
+
+    def __init__(self, timeout_seconds: float):
+        self.expires_at = time.monotonic() + timeout_seconds
+        self.cancelled = False
+        self.slot: Optional[int] = None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        if self.cancelled or time.monotonic() >= self.expires_at:
+            return True
+        return self.slot is not None and _cancel_flags is not None and bool(_cancel_flags[self.slot])
+
+    def cancel(self):
+        self.cancelled = True
+
+    def narrowed(self, timeout_seconds: float) -> "Deadline":
+        """Deadline for a part of the work: timeout_seconds from now, but no later than this one"""
+        narrowed = Deadline(timeout_seconds)
+        narrowed.expires_at = min(narrowed.expires_at, self.expires_at)
+        return narrowed
+
+    def check(self, stage: str):
+        if self.expired():
+            raise DeadlineExceeded(f"Stopped before {stage}")
+
+
+def check(deadline: Optional[Deadline], stage: str):
+    """Deadline check that tolerates callers without a deadline"""
+    if deadline is not None:
+        deadline.check(stage)
@@ -0,0 +1,161 @@
+"""One analysis stage for resumes and job descriptions.
+
+A document's text goes through a single pipeline that produces everything
+the API stores about it: the parser's fields (skills, experience, education)
+from one lowercased copy of the text, and the matcher's keyword profile and
+domain from one automaton scan. Both come out as one record, so uploads and
+job submissions take one worker task instead of a parser task and a
+matcher task that each prepare the text again.
+
+Uploads served by the API and by the ingestion worker share the parsed
+resume cache through analyze_upload (analyze_upload_async on the API's
+event loop), are stored by store_upload and answer with upload_result.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from database_production import ParsedResumeDB, ResumeDB
+from deadline import Deadline, check
+from jobalytics_matcher import JobalyticsMatcher, get_matcher
+from logger import logger
+from parser import ResumeParser, get_resume_parser, parser_version
+
+
+def analysis_record(text: str, fields: Dict, keyword_profile: Dict) -> Dict:
+    """The record both sides read: parser fields at the top, the matcher's profile alongside"""
+    return {
+        'text': text,
+        'skills': fields['skills'],
+        'experience_years': fields['experience_years'],
+        'education': fields['education'],
+        'domain': keyword_profile['domain'],
+        'keyword_profile': keyword_profile
+    }
+
+
+def parsed_fields(record: Dict) -> Dict:
+    """The parser's part of a record, as the parsed resume cache stores it"""
+    return {name: record[name] for name in ('text', 'skills', 'experience_years', 'education')}
+
+
+class DocumentAnalyzer:
+    def __init__(self, matcher: JobalyticsMatcher, parser: ResumeParser):
+        self.matcher = matcher
+        self.parser = parser
+
+    def analyze_resume(self, text: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Analyze a resume's text; empty text is rejected before any keyword work"""
+        parsed = self.parser.parse_text(text, deadline)
+        return analysis_record(text, parsed, self.matcher.build_profile(text, deadline))
+
+    def analyze_resume_chunks(self, chunks: Iterable[str], deadline: Optional[Deadline] = None) -> Dict:
+        """Analyze a resume whose text arrives in chunks, profiling each chunk as it comes"""
+        pages: List[str] = []
+
+        def collected():
+            for chunk in chunks:
+                pages.append(chunk)
+                yield chunk
+
+        profile = self.matcher.build_profile_from_chunks(collected(), deadline)
+        text = "".join(pages)
+        return analysis_record(text, self.parser.parse_text(text, deadline), profile)
+
+    def analyze_job(self, text: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Analyze a job description; the record's fields are what the job requires"""
+        check(deadline, "job parsing")
+        fields = self.parser.extract_fields(text)
+        return analysis_record(text, fields, self.matcher.build_job_profile(text, deadline))
+
+
+def get_analyzer(version: Optional[str] = None) -> DocumentAnalyzer:
+    """Analyzer over the shared parser and the matcher of a vocabulary version"""
+    return DocumentAnalyzer(get_matcher(version), get_resume_parser())
+
+
+def cached_upload(content_hash: str) -> Optional[Dict]:
+    """Parsed resume cache entry of a PDF parsed before: its parsed fields and keyword profile"""
+    cached = ParsedResumeDB.get(content_hash, parser_version())
+    if cached:
+        logger.info(f"Parsed resume cache hit for {content_hash[:12]}")
+    return cached
+
+
+def cache_upload(content_hash: str, parsed: Dict, keyword_profile: Dict):
+    ParsedResumeDB.put(content_hash, parser_version(), parsed, keyword_profile)
+
+
+def analyze_upload(content_hash: str, matcher: JobalyticsMatcher, analyze: Callable[[], Dict],
+                   build_profile: Callable[[str], Dict]) -> Dict:
+    """Analysis record of an uploaded PDF, reused when the same PDF was parsed before.
+
+    analyze produces the record of a PDF not in the parsed resume cache;
+    build_profile rebuilds a cached record's keyword profile from its text
+    after a vocabulary change.
+    """
+    cached = cached_upload(content_hash)
+    if cached is None:
+        analysis = analyze()
+        cache_upload(content_hash, parsed_fields(analysis), analysis['keyword_profile'])
+        return analysis
+
+    parsed, keyword_profile = cached['parsed'], cached['keyword_profile']
+    if not matcher.is_current_profile(keyword_profile):
+        keyword_profile = build_profile(parsed['text'])
+        cache_upload(content_hash, parsed, keyword_profile)
+    return analysis_record(parsed['text'], parsed, keyword_profile)
+
+
+async def analyze_upload_async(content_hash: str, matcher: JobalyticsMatcher, analyze: Callable[[], Awaitable[Dict]],
+                               build_profile: Callable[[str], Awaitable[Dict]]) -> Dict:
+    """analyze_upload for the API, whose analysis runs on the worker pool; cache reads and writes go to threads"""
+    cached = await asyncio.to_thread(cached_upload, content_hash)
+    if cached is None:
+        analysis = await analyze()
+        await asyncio.to_thread(cache_upload, content_hash, parsed_fields(analysis), analysis['keyword_profile'])
+        return analysis
+
+    parsed, keyword_profile = cached['parsed'], cached['keyword_profile']
+    if not matcher.is_current_profile(keyword_profile):
+        keyword_profile = await build_profile(parsed['text'])
+        await asyncio.to_thread(cache_upload, content_hash, parsed, keyword_profile)
+    return analysis_record(parsed['text'], parsed, keyword_profile)
+
+
+def upload_result(resume_id: int, filename: str, resume: Dict, duplicate: bool) -> Dict:
+    """Response body of a resume upload, from an analysis record or a stored resume"""
+    return {
+        "id": resume_id,
+        "filename": filename,
+        "text_length": len(resume['text']),
+        "skills": resume['skills'],
+        "experience_years": resume['experience_years'],
+        "education": resume['education'],
+        "duplicate": duplicate
+    }
+
+
+def store_upload(user_id: int, filename: str, analysis: Dict, content_hash: str) -> Dict:
+    """Insert an analyzed upload and return its upload_result.
+
+    If the same user stored the same PDF since it was checked, that resume
+    is returned as the duplicate instead.
+    """
+    while True:
+        resume_id = ResumeDB.insert_resume(
+            user_id=user_id,
+            filename=filename,
+            text=analysis['text'],
+            embedding=None,
+            skills=analysis['skills'],
+            experience_years=analysis['experience_years'],
+            education=analysis['education'],
+            keyword_profile=analysis['keyword_profile'],
+            content_hash=content_hash
+        )
+        if resume_id is not None:
+            return upload_result(resume_id, filename, analysis, False)
+        resume = ResumeDB.get_resume_by_content(user_id, content_hash)
+        if resume is not None:
+            return upload_result(resume['id'], resume['filename'], resume, True)
+        # The other copy was deleted in between: insert again
@@ -0,0 +1,158 @@
+"""Queued resume ingestion.
+
+Usage: python ingestion_worker.py [--processes N]
+
+Uploads made with ``POST /api/resume/upload?async=true`` are stored in the
+ingestion_tasks table and answered with 202 and a task id right away.
+Workers started by this script claim tasks with SELECT ... FOR UPDATE SKIP
+LOCKED, parse and profile the PDF, insert the resume and record the result
+that ``GET /api/resume/tasks/{id}`` returns. They run on any host that
+reaches the database, as many as needed, so upload latency no longer
+depends on how busy the parsers are.
+
+A task whose worker dies is claimed again once INGESTION_LEASE_SECONDS have
+passed, and marked failed after INGESTION_MAX_ATTEMPTS claims. PDFs that
+cannot be parsed fail at once: another attempt would parse them the same way.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from typing import Dict
+
+import psycopg2
+
+from config import settings
+from logger import logger
+from database_production import db_pool, ResumeDB, IngestionDB, VocabularyDB
+from deadline import Deadline, DeadlineExceeded
+from document_analyzer import get_analyzer, analyze_upload, store_upload, upload_result
+from jobalytics_matcher import get_matcher, use_vocabulary
+from parser import get_resume_parser
+
+_stopping = False
+
+
+def analyze_content(content: bytes, content_hash: str, deadline: Deadline) -> Dict:
+    """Analysis record of a PDF, reused from the parsed resume cache when possible"""
+    analyzer = get_analyzer()
+    return analyze_upload(
+        content_hash, analyzer.matcher,
+        lambda: analyzer.analyze_resume_chunks(get_resume_parser().iter_pdf_text(content, deadline), deadline),
+        lambda text: analyzer.matcher.build_profile(text, deadline)
+    )
+
+
+def process_task(task: Dict):
+    task_id, user_id = task['id'], task['user_id']
+    if task['attempts'] > settings.ingestion_max_attempts:
+        IngestionDB.fail(task_id, "Error processing PDF", retry=False)
+        logger.error(f"Ingestion task {task_id} abandoned after {task['attempts'] - 1} attempts")
+        return
+
+    # The same PDF may have been uploaded again since the task was queued
+    resume = ResumeDB.get_resume_by_content(user_id, task['content_hash'])
+    if resume is not None:
+        IngestionDB.complete(task_id, resume['id'], upload_result(resume['id'], resume['filename'], resume, True))
+        logger.info(f"Ingestion task {task_id} duplicates resume {resume['id']}")
+        return
+
+    start = time.perf_counter()
+    try:
+        analysis = analyze_content(task['content'], task['content_hash'], Deadline(settings.ingestion_timeout_seconds))
+    except psycopg2.Error:
+        raise
+    except DeadlineExceeded:
+        IngestionDB.fail(task_id, "Processing timeout", retry=False)
+        logger.error(f"Ingestion task {task_id} timed out")
+        return
+    except Exception as e:
+        IngestionDB.fail(task_id, "Error processing PDF", retry=False)
+        logger.error(f"Ingestion task {task_id} could not be parsed: {e}")
+        return
+
+    result = store_upload(user_id, task['filename'], analysis, task['content_hash'])
+    IngestionDB.complete(task_id, result['id'], result)
+    logger.info(f"Ingestion task {task_id}: resume {result['id']} for user {user_id} in {time.perf_counter() - start:.2f}s")
+
+
+def follow_vocabulary():
+    """Switch to a vocabulary reloaded through the API"""
+    try:
+        version = VocabularyDB.get_version()
+        if version is not None and version != get_matcher().version:
+            use_vocabulary(version)
+    except Exception as e:
+        logger.warning(f"Vocabulary update check failed: {e}")
+
+
+def _stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+
+def run_worker():
+    """Claim and process tasks one at a time until SIGTERM or SIGINT; the current task is finished first"""
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    db_pool.initialize()
+    get_matcher()
+    get_resume_parser()
+    logger.info(f"Ingestion worker {os.getpid()} started")
+
+    vocabulary_checked = 0.0
+    while not _stopping:
+        if time.monotonic() - vocabulary_checked >= settings.vocabulary_poll_seconds:
+            follow_vocabulary()
+            vocabulary_checked = time.monotonic()
+        try:
+            task = IngestionDB.claim(settings.ingestion_lease_seconds)
+        except Exception as e:
+            logger.error(f"Ingestion queue unavailable: {e}")
+            task = None
+        if task is None:
+            time.sleep(settings.ingestion_poll_seconds)
+            continue
+        try:
+            process_task(task)
+        except Exception as e:
+            logger.error(f"Ingestion task {task['id']} failed: {e}")
+            try:
+                IngestionDB.fail(task['id'], "Error processing PDF", retry=task['attempts'] < settings.ingestion_max_attempts)
+            except Exception:
+                # The lease runs out and the task is claimed again
+                pass
+    db_pool.close_all()
+    logger.info(f"Ingestion worker {os.getpid()} stopped")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to run on this host")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker()
+        return 0
+
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run_worker, name=f"ingestion-{i}") for i in range(args.processes)]
+    for worker in workers:
+        worker.start()
+
+    def forward(signum, frame):
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for worker in workers:
+        worker.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
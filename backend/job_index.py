@@ -0,0 +1,222 @@
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional, Set, Hashable
+
+from deadline import Deadline, check
+from jobalytics_matcher import JobalyticsMatcher, PROFILE_SETS, DOMAIN_VOCABULARIES
+
+# Weight of one matched keyword in the numerator of each set's score
+TERM_WEIGHTS = {
+    "swe_essentials": 5,
+    "swe_nice_to_haves": 1,
+    "pm_marketing": 1,
+    "general": 1,
+}
+
+# Slack for float accumulation before comparing against rounded scores
+_EPSILON = 1e-9
+
+
+def profile_terms(profile: Dict, name: str) -> List[Hashable]:
+    """Index terms of one keyword set: (name, keyword id) or (name, keyword) for extras"""
+    terms: List[Hashable] = []
+    bits = profile['bits'].get(name, 0)
+    while bits:
+        low = bits & -bits
+        terms.append((name, low.bit_length() - 1))
+        bits ^= low
+    for kw in profile.get('extra', {}).get(name, ()):
+        terms.append((name, kw))
+    return terms
+
+
+def _size_class(total: int) -> int:
+    """Jobs are grouped by powers of two of their score denominator"""
+    return total.bit_length()
+
+
+class JobIndex:
+    """Inverted index from keyword term to a user's job ids.
+
+    Every score is a sum of per-keyword weights divided by a per-job total,
+    so a posting list restricted to jobs of similar total has a tight upper
+    bound on what it adds to any of them. ``top_k`` walks those lists from the
+    largest bound down and stops admitting new jobs once the bounds left
+    cannot beat the current k-th score (max-score pruning). Only candidates
+    whose own upper bound still reaches the top-k are scored exactly.
+    """
+
+    def __init__(self, matcher: JobalyticsMatcher, jobs: List[Dict], fingerprint: Tuple[int, int]):
+        self.matcher = matcher
+        self.version = matcher.version
+        self.fingerprint = fingerprint
+        self.jobs: Dict[int, Dict] = {}
+        self.totals: Dict[int, int] = {}
+        # term -> size class -> job ids
+        self.postings: Dict[Hashable, Dict[int, Set[int]]] = {}
+        # Smallest total per size class; left stale on delete, which keeps it a valid bound
+        self.min_totals: Dict[int, int] = {}
+        self.lock = threading.Lock()
+
+        for job in jobs:
+            self._add(job)
+
+    def _add(self, job: Dict):
+        profile = job['keyword_profile']
+        names = DOMAIN_VOCABULARIES[profile['domain']]
+        terms = [term for name in names for term in profile_terms(profile, name)]
+        total = sum(TERM_WEIGHTS[name] for name, _ in terms)
+        size_class = _size_class(total)
+
+        self.jobs[job['id']] = job
+        self.totals[job['id']] = total
+        if total < self.min_totals.get(size_class, total + 1):
+            self.min_totals[size_class] = total
+        for term in terms:
+            self.postings.setdefault(term, {}).setdefault(size_class, set()).add(job['id'])
+
+    def add_job(self, job: Dict):
+        """Index a newly inserted job"""
+        with self.lock:
+            self._remove(job['id'])
+            self._add(job)
+            count, id_sum = self.fingerprint
+            self.fingerprint = (count + 1, id_sum + job['id'])
+
+    def remove_job(self, job_id: int):
+        """Drop a deleted job"""
+        with self.lock:
+            self._remove(job_id)
+            count, id_sum = self.fingerprint
+            self.fingerprint = (count - 1, id_sum - job_id)
+
+    def _remove(self, job_id: int):
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return
+        size_class = _size_class(self.totals.pop(job_id))
+        profile = job['keyword_profile']
+        for name in DOMAIN_VOCABULARIES[profile['domain']]:
+            for term in profile_terms(profile, name):
+                classes = self.postings.get(term, {})
+                postings = classes.get(size_class)
+                if postings is not None:
+                    postings.discard(job_id)
+                    if not postings:
+                        del classes[size_class]
+                    if not classes:
+                        del self.postings[term]
+
+    def top_k(self, resume_profile: Dict, k: int, deadline: Optional[Deadline] = None) -> List[Tuple[int, float]]:
+        """Top-k (job id, score), best first; ties go to the newest job"""
+        if k <= 0:
+            return []
+
+        with self.lock:
+            lists = []
+            for name in PROFILE_SETS:
+                weight = TERM_WEIGHTS[name]
+                for term in profile_terms(resume_profile, name):
+                    for size_class, postings in self.postings.get(term, {}).items():
+                        bound = weight / self.min_totals[size_class]
+                        lists.append((bound, weight, size_class, postings))
+            lists.sort(key=lambda entry: entry[0], reverse=True)
+
+            remaining = sum(entry[0] for entry in lists)
+            remaining_by_class: Dict[int, float] = {}
+            for bound, _, size_class, _ in lists:
+                remaining_by_class[size_class] = remaining_by_class.get(size_class, 0.0) + bound
+
+            partial: Dict[int, float] = {}
+            threshold = 0.0
+            for position, (bound, weight, size_class, postings) in enumerate(lists):
+                # A job not seen yet can reach at most the bounds left
+                if len(partial) >= k and round(remaining + _EPSILON, 4) < threshold:
+                    break
+                totals = self.totals
+                for job_id in postings:
+                    partial[job_id] = partial.get(job_id, 0.0) + weight / totals[job_id]
+                remaining -= bound
+                remaining_by_class[size_class] -= bound
+                if position % 8 == 7:
+                    check(deadline, "posting lists")
+                    if len(partial) >= k:
+                        threshold = round(heapq.nlargest(k, partial.values())[-1] - _EPSILON, 4)
+
+            # Exact scores only for jobs whose own upper bound can still reach the top-k
+            scored = []
+            for position, (job_id, lower) in enumerate(partial.items()):
+                if position % 256 == 255:
+                    check(deadline, "exact scoring")
+                upper = lower + remaining_by_class[_size_class(self.totals[job_id])]
+                if round(upper + _EPSILON, 4) < threshold:
+                    continue
+                score, _ = self.matcher.score_profiles(resume_profile, self.jobs[job_id]['keyword_profile'])
+                scored.append((-score, -job_id))
+
+            top = [(-neg_id, -neg_score) for neg_score, neg_id in heapq.nsmallest(k, scored)]
+            top = [(job_id, score) for job_id, score in top if score > 0]
+
+            # Jobs without any shared keyword score zero and fill the rest, newest first
+            if len(top) < k:
+                chosen = {job_id for job_id, _ in top}
+                for job_id in sorted(self.jobs, reverse=True):
+                    if len(top) >= k:
+                        break
+                    if job_id not in chosen:
+                        top.append((job_id, 0.0))
+            return top
+
+
+class JobIndexRegistry:
+    """Per-user job indexes, least recently used evicted first.
+
+    Indexes carry a (job count, sum of job ids) fingerprint that is updated
+    with every incremental change; a mismatch with the database means another
+    worker changed the user's jobs and the index is rebuilt.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self.indexes: "OrderedDict[int, JobIndex]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id: int, fingerprint: Tuple[int, int], version: str) -> Optional[JobIndex]:
+        """Cached index if it still matches the user's jobs and the vocabulary version"""
+        with self.lock:
+            index = self.indexes.get(user_id)
+            if index is None:
+                return None
+            if index.fingerprint != fingerprint or index.version != version:
+                del self.indexes[user_id]
+                return None
+            self.indexes.move_to_end(user_id)
+            return index
+
+    def put(self, user_id: int, index: JobIndex):
+        with self.lock:
+            self.indexes[user_id] = index
+            self.indexes.move_to_end(user_id)
+            while len(self.indexes) > self.max_users:
+                self.indexes.popitem(last=False)
+
+    def add_job(self, user_id: int, job: Dict):
+        with self.lock:
+            index = self.indexes.get(user_id)
+            if index is not None and index.version != job['keyword_profile']['version']:
+                # Built before a vocabulary swap; the next read rebuilds it
+                del self.indexes[user_id]
+                index = None
+        if index is not None:
+            index.add_job(job)
+
+    def remove_job(self, user_id: int, job_id: int):
+        with self.lock:
+            index = self.indexes.get(user_id)
+        if index is not None:
+            index.remove_job(job_id)
+
+    def clear(self):
+        with self.lock:
+            self.indexes.clear()
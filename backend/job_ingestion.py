@@ -0,0 +1,242 @@
+"""Bulk ingestion of job feeds.
+
+Usage: python job_ingestion.py FEED --user EMAIL [--format {jsonl,csv}] [--source NAME] [--processes N]
+
+A feed holds one job per JSONL line or CSV row, with the fields of
+POST /api/jobs: title, company, description and optionally url (a CSV feed
+names them in its header row). The same pipeline serves POST /api/jobs/bulk.
+
+Records are analyzed in batches of JOB_FEED_BATCH_SIZE, one worker task per
+batch, while the feed is read on. Each batch is stored in one transaction
+that COPYs its jobs and skill rows and moves the feed's checkpoint. Batches
+are stored in feed order, so a feed ingested again under the same source
+name resumes after the last stored batch.
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import os
+import sys
+from collections import deque
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
+
+from config import settings
+from logger import logger
+from database_production import db_pool, JobDB, UserDB
+from deadline import Deadline, DeadlineExceeded
+from jobalytics_matcher import get_matcher
+from validators import sanitize_string
+from worker_pool import WorkerPool, WorkerPoolBusy, analyze_jobs
+
+FEED_FORMATS = ("jsonl", "csv")
+FEED_CHUNK_SIZE = 256 * 1024
+
+# (record number, fields, error): a record that cannot be read has an error instead of fields
+FeedRecord = Tuple[int, Optional[Dict], Optional[str]]
+
+
+async def read_chunks(feed: BinaryIO) -> AsyncIterator[bytes]:
+    while chunk := await asyncio.to_thread(feed.read, FEED_CHUNK_SIZE):
+        yield chunk
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_feed_records(chunks: AsyncIterator[bytes], feed_format: str) -> AsyncIterator[FeedRecord]:
+    """A feed's records, numbered from 1; blank lines are skipped"""
+    number = 0
+    if feed_format == "jsonl":
+        async for line in iter_lines(chunks):
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield number, None, "Invalid JSON"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "Expected a JSON object"
+                continue
+            yield number, record, None
+        return
+
+    header, record_lines, quotes = None, [], 0
+    async for line in iter_lines(chunks):
+        # A quoted field may span lines; the record is complete once its quotes balance
+        record_lines.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        text = "\n".join(record_lines)
+        record_lines, quotes = [], 0
+        if not text.strip():
+            continue
+        row = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip().lower() for name in row]
+            continue
+        number += 1
+        if len(row) != len(header):
+            yield number, None, "Wrong number of columns"
+            continue
+        yield number, dict(zip(header, row)), None
+    if record_lines:
+        yield number + 1, None, "Unterminated quoted field"
+
+
+def normalize_job(record: Dict) -> Dict:
+    """A record's job fields, sanitized as POST /api/jobs does; raises ValueError when one is missing"""
+    job = {}
+    for field, max_length in (('title', 255), ('company', 255), ('description', 50000)):
+        value = record.get(field)
+        job[field] = sanitize_string(value, max_length) if isinstance(value, str) else ""
+        if not job[field]:
+            raise ValueError(f"Missing {field}")
+    url = record.get('url')
+    job['url'] = (sanitize_string(url, 2048) or None) if isinstance(url, str) else None
+    return job
+
+
+async def analyze_batch(pool: WorkerPool, texts: List[str], version: str) -> List[Dict]:
+    """Analyze a batch on the pool, waiting for room rather than failing when the pool is saturated"""
+    while True:
+        try:
+            return await pool.run(analyze_jobs, texts, version, size=sum(map(len, texts)),
+                                  deadline=Deadline(settings.job_feed_batch_timeout_seconds))
+        except WorkerPoolBusy:
+            await asyncio.sleep(1)
+
+
+async def ingest_job_feed(records: AsyncIterator[FeedRecord], user_id: int, pool: WorkerPool,
+                          source: Optional[str] = None) -> AsyncIterator[Dict]:
+    """Ingest a feed's records for a user, yielding progress after each stored batch.
+
+    At most one batch per worker process, plus the one being stored, is in
+    flight; past that the feed is not read until the oldest batch is stored.
+    With a source, records up to its checkpoint are skipped.
+    """
+    version = get_matcher().version
+    resumed_from = await asyncio.to_thread(JobDB.get_feed_checkpoint, user_id, source) if source else 0
+    yield {"status": "started", "resumed_from": resumed_from}
+
+    in_flight = deque()
+    max_in_flight = max(pool.size, 1) + 1
+    totals = {"records_done": resumed_from, "inserted": 0, "failed": 0}
+
+    async def store_oldest() -> Dict:
+        task, jobs, failures, records_done = in_flight.popleft()
+        rows = []
+        if task:
+            try:
+                analyses = await task
+            except (DeadlineExceeded, asyncio.TimeoutError):
+                failures = failures + [{"record": job['record'], "error": "Processing timeout"} for job in jobs]
+                analyses = []
+            rows = [
+                {
+                    **job,
+                    'required_skills': analysis['skills'],
+                    'experience_required': analysis['experience_years'],
+                    'education_required': analysis['education'],
+                    'keyword_profile': analysis['keyword_profile']
+                }
+                for job, analysis in zip(jobs, analyses)
+            ]
+        job_ids = await asyncio.to_thread(JobDB.insert_jobs, user_id, rows, source, records_done)
+        totals["records_done"] = records_done
+        totals["inserted"] += len(job_ids)
+        totals["failed"] += len(failures)
+        return {"status": "batch", "records_done": records_done, "inserted": len(job_ids), "failed": failures}
+
+    def submit(jobs: List[Dict], failures: List[Dict], records_done: int):
+        texts = [job['description'] for job in jobs]
+        task = asyncio.ensure_future(analyze_batch(pool, texts, version)) if jobs else None
+        in_flight.append((task, jobs, failures, records_done))
+
+    jobs, failures, records_done = [], [], resumed_from
+    try:
+        async for number, record, error in records:
+            if number <= resumed_from:
+                continue
+            records_done = number
+            try:
+                if error:
+                    raise ValueError(error)
+                jobs.append({**normalize_job(record), 'record': number})
+            except ValueError as e:
+                failures.append({"record": number, "error": str(e)})
+            if len(jobs) + len(failures) >= settings.job_feed_batch_size:
+                submit(jobs, failures, records_done)
+                jobs, failures = [], []
+                while len(in_flight) >= max_in_flight:
+                    yield await store_oldest()
+        if jobs or failures:
+            submit(jobs, failures, records_done)
+        while in_flight:
+            yield await store_oldest()
+    except Exception as e:
+        logger.error(f"Job feed ingestion for user {user_id} stopped: {e}")
+        yield {"status": "error", "error": "Ingestion stopped; send the feed again to resume", **totals}
+        return
+    finally:
+        # The client went away or a batch failed to store: drop the rest
+        for task, *_ in in_flight:
+            if task:
+                task.cancel()
+
+    logger.info(f"Job feed ingested for user {user_id}: {totals['inserted']} jobs, {totals['failed']} failed")
+    yield {"status": "finished", **totals}
+
+
+async def ingest_file(path: str, feed_format: str, user_id: int, pool: WorkerPool, source: Optional[str]) -> bool:
+    """Ingest a feed file, printing progress as NDJSON; returns whether it finished"""
+    finished = False
+    with open(path, "rb") as feed:
+        records = iter_feed_records(read_chunks(feed), feed_format)
+        async for progress in ingest_job_feed(records, user_id, pool, source):
+            print(json.dumps(progress), flush=True)
+            finished = progress["status"] == "finished"
+    return finished
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("feed", help="JSONL or CSV file of jobs")
+    parser.add_argument("--user", required=True, help="email of the account the jobs are added to")
+    parser.add_argument("--format", choices=FEED_FORMATS, help="feed format (default: from the file extension)")
+    parser.add_argument("--source", help="checkpoint name for resuming (default: the feed's absolute path)")
+    parser.add_argument("--processes", type=int, default=settings.worker_pool_size)
+    args = parser.parse_args()
+
+    feed_format = args.format or ("csv" if args.feed.lower().endswith(".csv") else "jsonl")
+    source = args.source or os.path.abspath(args.feed)
+
+    db_pool.initialize()
+    pool = WorkerPool(size=args.processes, queue_depth=args.processes + 1, inline_size=0)
+    try:
+        user = UserDB.get_user_by_email(args.user.strip().lower())
+        if not user:
+            print(f"No account for {args.user}", file=sys.stderr)
+            return 1
+        pool.start()
+        return 0 if asyncio.run(ingest_file(args.feed, feed_format, user['id'], pool, source)) else 1
+    finally:
+        pool.shutdown()
+        db_pool.close_all()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
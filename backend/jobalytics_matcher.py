@@ -1,62 +1,293 @@
 import re
-from typing import List, Dict, Tuple, Set
+import json
+import hashlib
+import importlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Set, Optional, FrozenSet, Iterable
+
+import numpy as np
 
 # Keyword lists from Jobalytics
-from jobalytics_keywords import (
-    general_keywords,
-    swe_essentials,
-    swe_nice_to_haves,
-    pm_marketing_keywords,
-    synonyms
-)
+import jobalytics_keywords
+from keyword_engine import KeywordAutomaton, get_automaton
+from vocabulary_artifact import load_artifact, write_artifact
+from logger import logger
+from deadline import Deadline, check
 
 WORD_PREFIXES = [
     "communicat", "strateg", "project manage", "product manage",
     "engineer", "collaborat", "machine learning"
 ]
 
+SUFFIXES = ["ing", "d", "ed", "s"]
+
+# Base form plus every suffixed form, recognized together in one pass
+KEYWORD_FORMS = [""] + SUFFIXES
+
+# Keyword sets stored in a profile -> list in jobalytics_keywords they are read from
+VOCABULARY_SOURCES = {
+    "swe_essentials": "swe_essentials",
+    "swe_nice_to_haves": "swe_nice_to_haves",
+    "pm_marketing": "pm_marketing_keywords",
+    "general": "general_keywords",
+}
+
+PROFILE_SETS = list(VOCABULARY_SOURCES)
+
+# Keyword sets each job domain is scored with
+DOMAIN_VOCABULARIES = {
+    "swe": ["swe_essentials", "swe_nice_to_haves"],
+    "pm_marketing": ["pm_marketing"],
+    "general": ["general"],
+}
+
+# Substrings that put a text in a domain, checked in order; anything else is "general"
+DOMAIN_MARKERS = {
+    "swe": [
+        "engineer", "developer", "programmer", "coder", "solutions architect",
+        "machine learning", "ai", "tech"
+    ],
+    "pm_marketing": [
+        "product", "marketing", "marketer", "advertising", "advertiser", "copywriting",
+        "copywriter", "social media", "brand", "ambassador", "cmo"
+    ],
+}
+
+# Same rules as regexes, for texts the automaton cannot decide (see fetch_domain)
+DOMAIN_REGEXES = {
+    domain: re.compile("|".join(map(re.escape, markers)), re.IGNORECASE)
+    for domain, markers in DOMAIN_MARKERS.items()
+}
+
+# Context kept between chunks to re-check domain markers the automaton cannot decide
+DOMAIN_CONTEXT = max(len(marker) for markers in DOMAIN_MARKERS.values() for marker in markers) + 1
+
+# Long texts are scanned in pieces of this many characters, with a deadline check between them
+EXTRACTION_CHUNK_SIZE = 16384
+
+# Bump when the layout of stored profiles changes
+PROFILE_FORMAT = 6
+
+def vocabulary_version(lists: Dict[str, List[str]], synonym_groups: List[List[str]]) -> str:
+    """Stamped on stored profiles; changes whenever any keyword list or rule changes"""
+    payload = json.dumps(
+        [PROFILE_FORMAT, lists, synonym_groups, WORD_PREFIXES, KEYWORD_FORMS, DOMAIN_MARKERS],
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def automaton_words(words: List[str]) -> List[str]:
+    """Keyword order an automaton is built with: longest first"""
+    return sorted(words, key=len, reverse=True)
+
+def text_hash(text: str) -> str:
+    """Content hash identifying a resume or job text"""
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class KeywordCanonicalizer:
+    """Synonym groups and prefix rules compiled into hash lookups"""
+
+    def __init__(self, synonym_groups: List[List[str]], prefixes: List[str], vocabulary: List[str]):
+        self.prefixes = list(prefixes)
+
+        # keyword -> every synonym group containing it, in group order
+        self.synonym_groups: Dict[str, Tuple[int, ...]] = {}
+        for i, group in enumerate(synonym_groups):
+            for kw in group:
+                self.synonym_groups[kw] = self.synonym_groups.get(kw, ()) + (i,)
+
+        # keyword -> indices of the prefixes it starts with
+        self.prefix_rules: Dict[str, Tuple[int, ...]] = {}
+        for kw in set(vocabulary) | set(self.synonym_groups):
+            self.prefix_rules[kw] = self._match_prefixes(kw)
+
+    def _match_prefixes(self, kw: str) -> Tuple[int, ...]:
+        return tuple(i for i, prefix in enumerate(self.prefixes) if kw.startswith(prefix))
+
+    def correct_for_synonyms(self, keywords: List[str]) -> List[str]:
+        """Replace synonyms with the first member of their group seen in keywords"""
+        idx_to_kw = {}
+        for kw in keywords:
+            for i in self.synonym_groups.get(kw, ()):
+                if i not in idx_to_kw:
+                    idx_to_kw[i] = kw
+
+        # A keyword listed in several groups maps through the last one. Input
+        # order is kept: the prefix pass picks its representatives by it
+        return list(dict.fromkeys(
+            idx_to_kw[self.synonym_groups[kw][-1]] if kw in self.synonym_groups else kw
+            for kw in keywords
+        ))
+
+    def correct_for_prefixes(self, keywords: List[str]) -> List[str]:
+        """Replace keywords sharing a prefix rule with the first one seen"""
+        prefix_to_kw = {}
+        kw_to_prefix = {}
+        for kw in keywords:
+            rules = self.prefix_rules.get(kw)
+            if rules is None:
+                rules = self._match_prefixes(kw)
+            if rules:
+                kw_to_prefix[kw] = rules[-1]
+                for i in rules:
+                    if i not in prefix_to_kw:
+                        prefix_to_kw[i] = kw
+
+        return list(dict.fromkeys(
+            prefix_to_kw[kw_to_prefix[kw]] if kw in kw_to_prefix else kw
+            for kw in keywords
+        ))
+
+
+class KeywordIdSpace:
+    """Global keyword -> bit position mapping over every vocabulary.
+
+    Profiles store each keyword set as one Python int, so set comparisons
+    become AND/ANDNOT plus popcount. Keywords outside the vocabulary (odd
+    case-folded surface forms) are kept aside as plain strings.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted(set(keywords))
+        self.ids = {kw: i for i, kw in enumerate(self.keywords)}
+
+    def encode(self, keywords: Iterable[str]) -> Tuple[int, List[str]]:
+        bits = 0
+        extra = []
+        for kw in keywords:
+            kw_id = self.ids.get(kw)
+            if kw_id is None:
+                extra.append(kw)
+            else:
+                bits |= 1 << kw_id
+        return bits, sorted(set(extra))
+
+    def decode(self, bits: int) -> List[str]:
+        keywords = []
+        while bits:
+            low = bits & -bits
+            keywords.append(self.keywords[low.bit_length() - 1])
+            bits ^= low
+        return keywords
+
+
+class Vocabulary:
+    """One version of the keyword lists and everything compiled from them.
+
+    Vocabularies are immutable; a reload builds a new one and swaps the
+    matcher, so an operation that holds a matcher sees one consistent
+    version from start to finish.
+    """
+
+    def __init__(self, lists: Dict[str, List[str]], synonym_groups: List[List[str]],
+                 automaton: Optional[KeywordAutomaton] = None):
+        self.lists = lists
+        self.synonyms = synonym_groups
+        self.version = vocabulary_version(lists, synonym_groups)
+        self.keywords = [w.lower().replace('-', ' ') for name in PROFILE_SETS for w in lists[name]]
+        self.canonicalizer = KeywordCanonicalizer(synonym_groups, WORD_PREFIXES, self.keywords)
+        self.keyword_ids = KeywordIdSpace(self.keywords)
+        # uint64 words needed to hold one keyword set in a bit matrix row
+        self.bitset_words = (len(self.keyword_ids.keywords) + 63) // 64
+        # Every profile set, every suffixed form and the domain markers in one automaton
+        self.automaton = automaton or KeywordAutomaton(
+            {name: automaton_words(lists[name]) for name in PROFILE_SETS}, KEYWORD_FORMS, DOMAIN_MARKERS
+        )
+
+    @classmethod
+    def from_source(cls, reload: bool = False) -> "Vocabulary":
+        """Vocabulary defined by jobalytics_keywords, re-read from disk when reload is set.
+
+        Loaded from the compiled artifact when one exists for its version;
+        otherwise compiled here and written out for the other processes.
+        """
+        source = importlib.reload(jobalytics_keywords) if reload else jobalytics_keywords
+        lists = {name: list(getattr(source, attr)) for name, attr in VOCABULARY_SOURCES.items()}
+        synonym_groups = [list(group) for group in source.synonyms]
+
+        artifact = load_artifact(vocabulary_version(lists, synonym_groups))
+        if artifact is not None:
+            return cls(artifact.lists, artifact.synonyms, artifact.automaton)
+
+        vocabulary = cls(lists, synonym_groups)
+        try:
+            write_artifact(vocabulary)
+        except OSError as e:
+            logger.warning(f"Could not write vocabulary artifact: {e}")
+        return vocabulary
+
+    @classmethod
+    def from_version(cls, version: str) -> "Vocabulary":
+        """Vocabulary of a given version, from its artifact or from the source if that matches"""
+        artifact = load_artifact(version)
+        if artifact is not None:
+            return cls(artifact.lists, artifact.synonyms, artifact.automaton)
+        vocabulary = cls.from_source(reload=True)
+        if vocabulary.version != version:
+            raise LookupError(f"Vocabulary version {version} is not available")
+        return vocabulary
+
+
+# (bits, keywords outside the id space) for one keyword set of a profile
+KeywordSet = Tuple[int, FrozenSet[str]]
+# (matched bits, missing bits, matched extras, missing extras)
+ComparedSet = Tuple[int, int, FrozenSet[str], FrozenSet[str]]
+
+def _bits_to_words(bits: int, width: int) -> np.ndarray:
+    return np.frombuffer(bits.to_bytes(width * 8, 'little'), dtype='<u8')
+
+
+class ProfileMatrix:
+    """Resume profiles packed into uint64 bit matrices, one row per profile"""
+
+    def __init__(self, profiles: List[Dict], bitset_words: int, deadline: Optional[Deadline] = None):
+        self.profiles = profiles
+        self.size = len(profiles)
+        self.bitset_words = bitset_words
+        width = bitset_words * 8
+        self.bits = {}
+        for name in PROFILE_SETS:
+            check(deadline, f"packing {name}")
+            self.bits[name] = np.frombuffer(
+                b''.join(profile['bits'].get(name, 0).to_bytes(width, 'little') for profile in profiles),
+                dtype='<u8'
+            ).reshape(self.size, bitset_words)
+        # Rows with keywords outside the id space are corrected in Python
+        self.extra_rows = [i for i, profile in enumerate(profiles) if profile.get('extra')]
+
+
 class JobalyticsMatcher:
+    def __init__(self, vocabulary: Vocabulary):
+        self.vocabulary = vocabulary
+        self.version = vocabulary.version
     
-    def fetch_domain(self, text: str) -> str:
-        """Detect job domain from text"""
-        text_lower = text.lower()
-        
-        swe_regex = re.compile(
-            r"engineer(ing)?|developer|programmer|coder|solutions architect|"
-            r"machine learning|ai|tech( analyst)?",
-            re.IGNORECASE
-        )
-        
-        pm_marketing_regex = re.compile(
-            r"product|marketing|marketer|advertising|advertiser|copywriting|"
-            r"copywriter|social media|brand|ambassador|cmo",
-            re.IGNORECASE
-        )
-        
-        if swe_regex.search(text_lower):
-            return "swe"
-        elif pm_marketing_regex.search(text_lower):
-            return "pm_marketing"
-        else:
-            return "general"
+    @staticmethod
+    def _domain_markers(text: str, found: Optional[Set[str]] = None) -> Set[str]:
+        """Domains whose markers occur in text, given the markers a scan of it found"""
+        if found is None or "\u0130" in text:
+            # The rules run on text.lower(), which turns dotted capital I into two
+            # characters; the automaton folds it to one, so such texts use the regexes
+            text_lower = text.lower()
+            return {domain for domain, regex in DOMAIN_REGEXES.items() if regex.search(text_lower)}
+        return found
+    
+    def fetch_domain(self, text: str, markers: Optional[Set[str]] = None) -> str:
+        """Detect job domain from text, or from the markers a scan of it found"""
+        return self._domain(self._domain_markers(text, markers))
+    
+    @staticmethod
+    def _domain(markers: Set[str]) -> str:
+        for domain in DOMAIN_MARKERS:
+            if domain in markers:
+                return domain
+        return "general"
     
     def get_keywords_from_text(self, text: str, words: List[str]) -> List[str]:
         """Extract keywords from text"""
-        # Filter special words (with non-word chars)
-        regex_special = re.compile(r'\b[a-z]\W+\B', re.IGNORECASE)
-        special_words = [w for w in words if regex_special.search(w)]
-        normal_words = [w for w in words if not regex_special.search(w)]
-        
-        # Escape regex metacharacters
-        regex_metachars = re.compile(r'[(){[*+?.\\^$|]')
-        normal_words = [regex_metachars.sub(r'\\\g<0>', w) for w in normal_words]
-        special_words = [regex_metachars.sub(r'\\\g<0>', w) for w in special_words]
-        
-        # Build regex pattern
-        pattern = r'\b(?:' + '|'.join(special_words) + r')\B|\b(?:' + '|'.join(normal_words) + r')\b'
-        regex = re.compile(pattern, re.IGNORECASE)
-        
-        matches = regex.findall(text)
+        # Automaton is built once per word list and cached
+        matches = get_automaton(words).findall(text)
         keywords = list(set([m.lower() for m in matches]))
         
         # Replace dashes with spaces
@@ -66,80 +297,31 @@ class JobalyticsMatcher:
     
     def get_keywords_with_suffixes(self, text: str, domain: List[str]) -> List[str]:
         """Extract keywords with suffix variations"""
-        suffixes = ["ing", "d", "ed", "s"]
-        words = sorted(domain, key=len, reverse=True)
-        
-        all_keywords = self.get_keywords_from_text(text, words)
-        
-        for suffix in suffixes:
-            suffix_words = [w + suffix for w in words]
-            suffix_keywords = self.get_keywords_from_text(text, suffix_words)
-            # Remove suffix from matched keywords
-            suffix_keywords = [k[:-len(suffix)] for k in suffix_keywords]
-            all_keywords.extend(suffix_keywords)
-        
-        return list(set(all_keywords))
+        return list(get_automaton(automaton_words(domain), KEYWORD_FORMS).extract(text))
     
     def correct_for_synonyms(self, keywords: List[str]) -> List[str]:
         """Replace synonyms with canonical form"""
-        idx_to_kw = {}
-        kw_to_idx = {}
-        
-        for kw in keywords:
-            for i, synonym_group in enumerate(synonyms):
-                if kw in synonym_group:
-                    kw_to_idx[kw] = i
-                    if i not in idx_to_kw:
-                        idx_to_kw[i] = kw
-        
-        result = []
-        for kw in keywords:
-            if kw in kw_to_idx:
-                result.append(idx_to_kw[kw_to_idx[kw]])
-            else:
-                result.append(kw)
-        
-        return list(set(result))
+        return self.vocabulary.canonicalizer.correct_for_synonyms(keywords)
     
     def correct_for_prefixes(self, keywords: List[str]) -> List[str]:
         """Normalize keywords with common prefixes"""
-        prefix_to_kw = {}
-        kw_to_prefix = {}
-        
-        for prefix in WORD_PREFIXES:
-            for kw in keywords:
-                if kw.startswith(prefix):
-                    kw_to_prefix[kw] = prefix
-                    if prefix not in prefix_to_kw:
-                        prefix_to_kw[prefix] = kw
-        
-        result = []
-        for kw in keywords:
-            if kw in kw_to_prefix:
-                result.append(prefix_to_kw[kw_to_prefix[kw]])
-            else:
-                result.append(kw)
+        return self.vocabulary.canonicalizer.correct_for_prefixes(keywords)
+    
+    def canonicalize(self, keywords: Iterable[str]) -> List[str]:
+        """Lowercase and apply synonym and prefix normalization.
         
-        return list(set(result))
+        Keywords are taken in sorted order, so "first seen" picks the same
+        representative in every process whatever the hash seed; profiles built
+        by different workers or before a restart put each keyword on the same bit.
+        """
+        return self.correct_for_prefixes(self.correct_for_synonyms(sorted({k.lower() for k in keywords})))
     
     def match_basic(self, resume_keywords: List[str], job_keywords: List[str]) -> Dict:
         """Basic matching algorithm for general/pm_marketing"""
-        resume_kw = [k.lower() for k in resume_keywords]
-        job_kw = [k.lower() for k in job_keywords]
-        
-        resume_kw = self.correct_for_prefixes(self.correct_for_synonyms(resume_kw))
-        job_kw = self.correct_for_prefixes(self.correct_for_synonyms(job_kw))
-        
-        matched = list(set(resume_kw) & set(job_kw))
-        missing = list(set(job_kw) - set(resume_kw))
-        
-        score = len(matched) / len(job_kw) if job_kw else 0.0
-        
-        return {
-            'score': round(score, 4),
-            'matches': matched,
-            'unmatches': missing
-        }
+        part = self._compare_sets(self._encode(resume_keywords), self._encode(job_keywords))
+        result = {'score': self._basic_score(part)}
+        result.update(self.decode_match([part]))
+        return result
     
     def match_weighted(
         self,
@@ -149,66 +331,251 @@ class JobalyticsMatcher:
         job_nice: List[str]
     ) -> Dict:
         """Weighted matching algorithm for SWE"""
-        resume_essentials = self.correct_for_prefixes(
-            self.correct_for_synonyms([k.lower() for k in resume_essentials])
-        )
-        resume_nice = self.correct_for_prefixes(
-            self.correct_for_synonyms([k.lower() for k in resume_nice])
-        )
-        job_essentials = self.correct_for_prefixes(
-            self.correct_for_synonyms([k.lower() for k in job_essentials])
-        )
-        job_nice = self.correct_for_prefixes(
-            self.correct_for_synonyms([k.lower() for k in job_nice])
+        essentials = self._compare_sets(self._encode(resume_essentials), self._encode(job_essentials))
+        nice = self._compare_sets(self._encode(resume_nice), self._encode(job_nice))
+        result = {'score': self._weighted_score(essentials, nice)}
+        result.update(self.decode_match([essentials, nice]))
+        return result
+    
+    def _encode(self, keywords: List[str]) -> KeywordSet:
+        bits, extra = self.vocabulary.keyword_ids.encode(self.canonicalize(keywords))
+        return bits, frozenset(extra)
+    
+    @staticmethod
+    def _compare_sets(resume_set: KeywordSet, job_set: KeywordSet) -> ComparedSet:
+        resume_bits, resume_extra = resume_set
+        job_bits, job_extra = job_set
+        return (
+            job_bits & resume_bits,
+            job_bits & ~resume_bits,
+            job_extra & resume_extra,
+            job_extra - resume_extra
         )
-        
-        essentials_matched = list(set(job_essentials) & set(resume_essentials))
-        essentials_missing = list(set(job_essentials) - set(resume_essentials))
-        
-        nice_matched = list(set(job_nice) & set(resume_nice))
-        nice_missing = list(set(job_nice) - set(resume_nice))
+    
+    @staticmethod
+    def _counts(part: ComparedSet) -> Tuple[int, int]:
+        matched, missing, matched_extra, missing_extra = part
+        return matched.bit_count() + len(matched_extra), missing.bit_count() + len(missing_extra)
+    
+    def _basic_score(self, part: ComparedSet) -> float:
+        matched, missing = self._counts(part)
+        score = matched / (matched + missing) if matched + missing else 0.0
+        return round(score, 4)
+    
+    def _weighted_score(self, essentials: ComparedSet, nice: ComparedSet) -> float:
+        essentials_matched, essentials_missing = self._counts(essentials)
+        nice_matched, nice_missing = self._counts(nice)
         
         if not essentials_matched and not essentials_missing and not nice_matched and not nice_missing:
             score = 0.0
         else:
             score = (
-                (len(essentials_matched) * 5 + len(nice_matched)) /
-                ((len(essentials_matched) + len(essentials_missing)) * 5 +
-                 len(nice_matched) + len(nice_missing))
+                (essentials_matched * 5 + nice_matched) /
+                ((essentials_matched + essentials_missing) * 5 +
+                 nice_matched + nice_missing)
             )
+        return round(score, 4)
+    
+    def decode_match(self, parts: List[ComparedSet]) -> Dict:
+        """Turn compared bitsets back into matched/unmatched keyword lists"""
+        keyword_ids = self.vocabulary.keyword_ids
+        matches = []
+        unmatches = []
+        for matched, missing, matched_extra, missing_extra in parts:
+            matches += keyword_ids.decode(matched) + sorted(matched_extra)
+            unmatches += keyword_ids.decode(missing) + sorted(missing_extra)
+        return {'matches': matches, 'unmatches': unmatches}
+    
+    def build_profile(self, text: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Extract every profile keyword set as bitsets, and the text's domain, in one scan"""
+        chunks = (text[i:i + EXTRACTION_CHUNK_SIZE] for i in range(0, len(text), EXTRACTION_CHUNK_SIZE))
+        return self.build_profile_from_chunks(chunks, deadline)
+    
+    def build_profile_from_chunks(self, chunks: Iterable[str], deadline: Optional[Deadline] = None) -> Dict:
+        """Build the profile of the text the chunks join to, consuming them as they come.
+        
+        Only the current chunk and a few dozen characters around it are held,
+        so a generator decoding PDF pages is profiled while later pages are
+        still being read.
+        """
+        scanner = self.vocabulary.automaton.scanner()
+        digest = hashlib.sha256()
+        markers: Set[str] = set()
+        context = ""
+        for number, chunk in enumerate(chunks, 1):
+            check(deadline, f"keyword extraction, chunk {number}")
+            found = scanner.feed(chunk)
+            digest.update(chunk.encode("utf-8", "surrogatepass"))
+            # Marker matches of this step lie within the chunk and the context before it
+            window = context + chunk
+            markers |= self._domain_markers(window, found)
+            context = window[-DOMAIN_CONTEXT:]
+        check(deadline, "keyword encoding")
+        found, last = scanner.close()
+        markers |= self._domain_markers(context, last)
         
-        return {
-            'score': round(score, 4),
-            'matches': essentials_matched + nice_matched,
-            'unmatches': essentials_missing + nice_missing
+        profile = {
+            'version': self.version,
+            'text_hash': digest.hexdigest(),
+            'domain': self._domain(markers),
+            'bits': {},
+            'extra': {}
         }
+        for name in PROFILE_SETS:
+            bits, extra = self.vocabulary.keyword_ids.encode(self.canonicalize(found[name]))
+            profile['bits'][name] = bits
+            if extra:
+                profile['extra'][name] = extra
+        return profile
     
-    def get_match_result(self, resume_text: str, job_text: str) -> Dict:
-        """Main matching function - exact Jobalytics algorithm"""
-        domain = self.fetch_domain(job_text)
+    def build_job_profile(self, job_text: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Job profiles are built like any other; the domain decides which sets are scored"""
+        return self.build_profile(job_text, deadline)
+    
+    def is_current_profile(self, profile: Optional[Dict]) -> bool:
+        """Check a stored profile was built with the current vocabulary"""
+        return bool(profile) and profile.get('version') == self.version
+    
+    @staticmethod
+    def _keyword_set(profile: Dict, name: str) -> KeywordSet:
+        extra = profile.get('extra', {}).get(name)
+        return profile['bits'][name], frozenset(extra) if extra else frozenset()
+    
+    def score_profiles(self, resume_profile: Dict, job_profile: Dict) -> Tuple[float, List[ComparedSet]]:
+        """Score two profiles without decoding any keyword strings"""
+        names = DOMAIN_VOCABULARIES[job_profile['domain']]
+        parts = [
+            self._compare_sets(self._keyword_set(resume_profile, name), self._keyword_set(job_profile, name))
+            for name in names
+        ]
         
-        if domain == "swe":
-            resume_ess = self.get_keywords_with_suffixes(resume_text, swe_essentials)
-            resume_nice = self.get_keywords_with_suffixes(resume_text, swe_nice_to_haves)
-            job_ess = self.get_keywords_with_suffixes(job_text, swe_essentials)
-            job_nice = self.get_keywords_with_suffixes(job_text, swe_nice_to_haves)
+        if job_profile['domain'] == "swe":
+            return self._weighted_score(parts[0], parts[1]), parts
+        return self._basic_score(parts[0]), parts
+    
+    def match_profiles(self, resume_profile: Dict, job_profile: Dict) -> Dict:
+        """Score two precomputed profiles and decode the keyword lists"""
+        score, parts = self.score_profiles(resume_profile, job_profile)
+        result = {'score': score}
+        result.update(self.decode_match(parts))
+        return result
+    
+    def rank_resumes(self, resumes: ProfileMatrix, job_profile: Dict, k: int,
+                     deadline: Optional[Deadline] = None) -> List[Tuple[int, float]]:
+        """Score every resume in the matrix against one job, return top-k (row, score)"""
+        if resumes.size == 0 or k <= 0:
+            return []
+        
+        parts = []
+        for name in DOMAIN_VOCABULARIES[job_profile['domain']]:
+            check(deadline, f"ranking {name}")
+            job_bits = job_profile['bits'].get(name, 0)
+            matched = np.bitwise_count(resumes.bits[name] & _bits_to_words(job_bits, resumes.bitset_words)).sum(axis=1, dtype=np.int64)
+            missing = job_bits.bit_count() - matched
             
-            return self.match_weighted(resume_ess, resume_nice, job_ess, job_nice)
+            job_extra = self._keyword_set(job_profile, name)[1]
+            if job_extra:
+                missing += len(job_extra)
+                for i in resumes.extra_rows:
+                    shared = len(job_extra & self._keyword_set(resumes.profiles[i], name)[1])
+                    matched[i] += shared
+                    missing[i] -= shared
+            parts.append((matched, missing))
+        
+        scores = self._batch_scores(parts, job_profile['domain'])
+        return self._top_k(scores, k)
+    
+    @staticmethod
+    def _batch_scores(parts: List[Tuple[np.ndarray, np.ndarray]], domain: str) -> np.ndarray:
+        """Vectorized score_profiles: per-row matched/missing counts of the domain's keyword sets, in order"""
+        if domain == "swe":
+            (ess_matched, ess_missing), (nice_matched, nice_missing) = parts
+            num = ess_matched * 5 + nice_matched
+            den = (ess_matched + ess_missing) * 5 + nice_matched + nice_missing
         else:
-            if domain == "pm_marketing":
-                keywords = pm_marketing_keywords
-            else:
-                keywords = general_keywords
-            
-            resume_kw = self.get_keywords_with_suffixes(resume_text, keywords)
-            job_kw = self.get_keywords_with_suffixes(job_text, keywords)
-            
-            return self.match_basic(resume_kw, job_kw)
+            num, missing = parts[0]
+            den = num + missing
+        
+        num, den = num.astype(np.float64), den.astype(np.float64)
+        return np.round(np.divide(num, den, out=np.zeros(len(num)), where=den > 0), 4)
+    
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Stable top-k: ties keep row order, like sorting the full list would"""
+        if k < len(scores):
+            part = np.argpartition(-scores, k - 1)[:k]
+            candidates = np.flatnonzero(scores >= scores[part].min())
+        else:
+            candidates = np.arange(len(scores))
+        order = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+        
+        return [(int(i), float(scores[i])) for i in order]
+    
+    def match_profile(self, resume_profile: Dict, job_text: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Match a precomputed resume profile against a job description"""
+        job_profile = self.build_job_profile(job_text, deadline)
+        check(deadline, "scoring")
+        return self.match_profiles(resume_profile, job_profile)
+    
+    def get_match_result(self, resume_text: str, job_text: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Main matching function - exact Jobalytics algorithm"""
+        job_profile = self.build_job_profile(job_text, deadline)
+        resume_profile = self.build_profile(resume_text, deadline)
+        check(deadline, "scoring")
+        return self.match_profiles(resume_profile, job_profile)
+
+# Matchers by vocabulary version: the current one plus recent ones still in use
+_matchers: "OrderedDict[str, JobalyticsMatcher]" = OrderedDict()
+_current_version: Optional[str] = None
+_matchers_lock = threading.Lock()
+_reload_lock = threading.Lock()
+
+# Older vocabularies kept for operations that started before a swap
+RETAINED_VOCABULARIES = 2
+
+def _install(matcher: JobalyticsMatcher, current: bool) -> JobalyticsMatcher:
+    global _current_version
+    with _matchers_lock:
+        matcher = _matchers.setdefault(matcher.version, matcher)
+        _matchers.move_to_end(matcher.version)
+        if current:
+            _current_version = matcher.version
+        while len(_matchers) > RETAINED_VOCABULARIES:
+            oldest = next(iter(_matchers))
+            if oldest == _current_version:
+                _matchers.move_to_end(oldest)
+                oldest = next(iter(_matchers))
+            del _matchers[oldest]
+    return matcher
+
+def get_matcher(version: Optional[str] = None) -> JobalyticsMatcher:
+    """Matcher for the current vocabulary, or for a specific vocabulary version"""
+    with _matchers_lock:
+        matcher = _matchers.get(version or _current_version)
+    if matcher is not None:
+        return matcher
+    if version is None:
+        with _reload_lock:
+            if _current_version is None:
+                return _install(JobalyticsMatcher(Vocabulary.from_source()), current=True)
+        return get_matcher()
+    return _install(JobalyticsMatcher(Vocabulary.from_version(version)), current=False)
+
+def reload_vocabulary() -> JobalyticsMatcher:
+    """Re-read the keyword source, compile it and swap it in as the current vocabulary.
 
-_matcher = None
+    Everything is built before the swap, which is a single reference
+    assignment, so requests keep running on the previous matcher meanwhile.
+    """
+    with _reload_lock:
+        vocabulary = Vocabulary.from_source(reload=True)
+        matcher = _install(JobalyticsMatcher(vocabulary), current=True)
+    logger.info(f"Vocabulary version {matcher.version} is now current")
+    return matcher
 
-def get_matcher() -> JobalyticsMatcher:
-    global _matcher
-    if _matcher is None:
-        _matcher = JobalyticsMatcher()
-    return _matcher
+def use_vocabulary(version: str) -> JobalyticsMatcher:
+    """Make a vocabulary version current, e.g. one another worker reloaded"""
+    with _reload_lock:
+        matcher = _install(get_matcher(version), current=True)
+    logger.info(f"Vocabulary version {matcher.version} is now current")
+    return matcher
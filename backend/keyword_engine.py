@@ -0,0 +1,444 @@
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Set, Tuple, Sequence, Optional
+
+# Same test JobalyticsMatcher used to split special words (c++, c#) from normal ones
+SPECIAL_WORD_REGEX = re.compile(r'\b[a-z]\W+\B', re.IGNORECASE)
+
+_fold_tables: Dict[str, Dict[int, str]] = {}
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+def _is_boundary(text: str, pos: int) -> bool:
+    """Equivalent of regex \\b at pos"""
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+
+def build_fold_table(alphabet: Sequence[str]) -> Dict[int, str]:
+    """Map every character that re.IGNORECASE treats as equal to an alphabet
+    character onto a single representative, so the automaton can run on a
+    translated copy of the text"""
+    chars = sorted(set(alphabet))
+    key = ''.join(chars)
+    if key in _fold_tables:
+        return _fold_tables[key]
+    if not chars:
+        return {}
+    char_class = re.compile('[' + ''.join(re.escape(c) for c in chars) + ']', re.IGNORECASE)
+
+    # Every code point, searched once and dropped: keeping it would cost each worker ~4 MB
+    universe = ''.join(map(chr, range(0x110000)))
+    found_chars = set(char_class.findall(universe))
+    del universe
+
+    table = {}
+    for found in found_chars:
+        for c in chars:
+            if re.fullmatch(re.escape(c), found, re.IGNORECASE):
+                table[ord(found)] = c
+                break
+    _fold_tables[key] = table
+    return table
+
+
+class _ClassTable(dict):
+    """str.translate table sending every character outside the alphabet to class 0"""
+
+    def __missing__(self, key: int) -> int:
+        return 0
+
+
+# Pattern kinds: how a match is bounded and what it produces
+NORMAL, SPECIAL, MARKER = 0, 1, 2
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over named keyword lists and their suffixed forms.
+
+    Each (list, suffix) channel, the empty suffix being the base form,
+    behaves like its own ``\\b(?:special)\\B|\\b(?:normal)\\b`` regex with
+    re.IGNORECASE and findall semantics: at each position the first keyword
+    in list order wins (special words before normal words), and scanning
+    resumes after the match. Markers are unbounded substrings whose presence
+    is reported per marker name, like ``re.search`` over an alternation.
+    Every list, form and marker is recognized in the same pass over the text.
+
+    The automaton is stored as flat tables: characters fold into a few dozen
+    classes and ``delta`` is the complete transition table (failure links
+    already followed), so scanning is one lookup per character. The tables
+    are plain int sequences that can be built here or loaded from a compiled
+    vocabulary artifact, including memoryviews over a shared mmap.
+    """
+
+    # Integer tables, in the order they are written to an artifact
+    TABLES = (
+        "class_chars", "class_ids", "delta", "out_start", "out_items",
+        "lengths", "ranks", "kinds", "channels",
+    )
+
+    def __init__(self, lists: Dict[str, List[str]], suffixes: Sequence[str] = ("",),
+                 markers: Optional[Dict[str, List[str]]] = None,
+                 tables: Optional[Dict[str, Sequence[int]]] = None,
+                 morphology: Optional[List[str]] = None):
+        self.lists = {name: list(words) for name, words in lists.items()}
+        self.suffixes = list(suffixes)
+        self.markers = {name: list(words) for name, words in (markers or {}).items()}
+        self.list_names = list(self.lists)
+        self.marker_names = list(self.markers)
+
+        # Patterns run list by list, suffix by suffix, in word order; markers come last.
+        # Channel of a keyword pattern is list index * len(suffixes) + suffix index.
+        self.patterns = [
+            w + suffix for words in self.lists.values() for suffix in self.suffixes for w in words
+        ]
+        self.num_keyword_patterns = len(self.patterns)
+        self.patterns += [w for words in self.markers.values() for w in words]
+        self.surfaces = [p.lower() for p in self.patterns]
+
+        if tables is None:
+            tables = self._compile()
+        self.tables = tables
+        for name in self.TABLES:
+            setattr(self, name, tables[name])
+        self.num_classes = len(set(self.class_ids)) + 1
+        self.class_table = _ClassTable(zip(self.class_chars, self.class_ids))
+        self.max_length = max(self.lengths, default=0)
+
+        # Morphology table: matched form -> base keyword as the matcher reports it
+        self.morphology = morphology if morphology is not None else [
+            self._base_form(self.surfaces[p], self.channels[p]) for p in range(self.num_keyword_patterns)
+        ]
+
+    def _base_form(self, surface: str, channel: int) -> str:
+        keyword = surface.replace('-', ' ')
+        cut = len(self.suffixes[channel % len(self.suffixes)])
+        return keyword[:-cut] if cut else keyword
+
+    def _compile(self) -> Dict[str, array]:
+        """Build the trie with failure links and flatten it into transition tables"""
+        fold_table = build_fold_table(''.join(self.patterns))
+        alphabet = sorted(set(fold_table.values()))
+        classes = {ch: i + 1 for i, ch in enumerate(alphabet)}
+        num_classes = len(alphabet) + 1
+
+        goto: List[Dict[int, int]] = [{}]
+        ends: Dict[int, List[int]] = {}
+        for idx, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern.translate(fold_table):
+                cls = classes[ch]
+                nxt = goto[state].get(cls)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][cls] = nxt
+                    goto.append({})
+                state = nxt
+            ends.setdefault(state, []).append(idx)
+
+        # Breadth-first pass: failure links, merged outputs and the dense table.
+        # A state's row starts as a copy of its failure state's row, which is
+        # complete already because failure states are shallower.
+        fail = [0] * len(goto)
+        output: List[Tuple[int, ...]] = [tuple(ends.get(state, ())) for state in range(len(goto))]
+        rows = [[0] * num_classes for _ in goto]
+        for cls, nxt in goto[0].items():
+            rows[0][cls] = nxt
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            row = rows[state]
+            row[:] = rows[fail[state]]
+            for cls, nxt in goto[state].items():
+                row[cls] = nxt
+                fail[nxt] = rows[fail[state]][cls]
+                queue.append(nxt)
+                if output[fail[nxt]]:
+                    output[nxt] = output[nxt] + output[fail[nxt]]
+
+        # Entries are next_state * num_classes (the row offset) shifted left, low bit set if it has output
+        delta = array('i', bytes(4 * len(goto) * num_classes))
+        for state, row in enumerate(rows):
+            base = state * num_classes
+            for cls, nxt in enumerate(row):
+                delta[base + cls] = (nxt * num_classes) << 1 | bool(output[nxt])
+
+        out_start = array('i', [0])
+        out_items = array('i')
+        for idxs in output:
+            out_items.extend(idxs)
+            out_start.append(len(out_items))
+
+        kinds = array('B')
+        ranks = array('i')
+        channels = array('H')
+        for list_index, words in enumerate(self.lists.values()):
+            n = len(words)
+            for suffix_index, suffix in enumerate(self.suffixes):
+                for word_index, w in enumerate(words):
+                    special = bool(SPECIAL_WORD_REGEX.search(w + suffix))
+                    kinds.append(SPECIAL if special else NORMAL)
+                    # Lower rank wins, same order the regex alternation tries branches in
+                    ranks.append((0 if special else 1) * n + word_index)
+                    channels.append(list_index * len(self.suffixes) + suffix_index)
+        for marker_index, words in enumerate(self.markers.values()):
+            for w in words:
+                kinds.append(MARKER)
+                ranks.append(0)
+                channels.append(marker_index)
+        return {
+            "class_chars": array('i', fold_table.keys()),
+            "class_ids": array('i', (classes[ch] for ch in fold_table.values())),
+            "delta": delta,
+            "out_start": out_start,
+            "out_items": out_items,
+            "lengths": array('i', map(len, self.patterns)),
+            "ranks": ranks,
+            "kinds": kinds,
+            "channels": channels,
+        }
+
+    def _feed(self, text: str, begin: int, stop: int, base: int, row: int,
+              best: List[Dict[int, Tuple[int, int, int]]], found: List[bool]) -> int:
+        """Run text[begin:stop] through the automaton from ``row``; returns the row reached.
+
+        Candidates go into ``best`` per channel as start -> (rank, end, pattern),
+        offset by ``base``, the position of text[0] in the whole document. The
+        character at ``stop`` must be the real next character (or stop must be
+        the end of the document) so normal and special words can be told apart.
+        """
+        delta = self.delta
+        out_start = self.out_start
+        out_items = self.out_items
+        lengths = self.lengths
+        ranks = self.ranks
+        kinds = self.kinds
+        channels = self.channels
+        num_classes = self.num_classes
+
+        translated = text[begin:stop].translate(self.class_table)
+        codes = translated.encode('latin-1') if num_classes <= 256 else map(ord, translated)
+
+        for i, code in enumerate(codes, begin):
+            entry = delta[row + code]
+            row = entry >> 1
+            if not entry & 1:
+                continue
+
+            state = row // num_classes
+            end = i + 1
+            end_boundary = None
+            for j in range(out_start[state], out_start[state + 1]):
+                idx = out_items[j]
+                kind = kinds[idx]
+                if kind == MARKER:
+                    found[channels[idx]] = True
+                    continue
+                start = end - lengths[idx]
+                if not _is_boundary(text, start):
+                    continue
+                if end_boundary is None:
+                    end_boundary = _is_boundary(text, end)
+                # Normal words need a boundary after them, special words must not have one
+                if end_boundary == kind:
+                    continue
+                channel_best = best[channels[idx]]
+                current = channel_best.get(start + base)
+                if current is None or ranks[idx] < current[0]:
+                    channel_best[start + base] = (ranks[idx], end + base, idx)
+        return row
+
+    def _new_candidates(self) -> List[Dict[int, Tuple[int, int, int]]]:
+        return [{} for _ in range(len(self.lists) * len(self.suffixes))]
+
+    def _candidates(self, text: str) -> Tuple[List[Dict[int, Tuple[int, int, int]]], List[bool]]:
+        """Best pattern starting at each position per channel, start -> (rank, end, pattern),
+        and which markers occur"""
+        best = self._new_candidates()
+        found = [False] * len(self.markers)
+        self._feed(text, 0, len(text), 0, 0, best, found)
+        return best, found
+
+    def find_spans(self, text: str) -> List[List[Tuple[int, int, int]]]:
+        """Non-overlapping (start, end, pattern) spans per channel, leftmost first"""
+        return self._spans(self._candidates(text)[0])
+
+    @staticmethod
+    def _spans(candidates: List[Dict[int, Tuple[int, int, int]]]) -> List[List[Tuple[int, int, int]]]:
+        result = []
+        for best in candidates:
+            spans = []
+            pos = 0
+            for start in sorted(best):
+                if start < pos:
+                    continue
+                _, end, idx = best[start]
+                spans.append((start, end, idx))
+                pos = end
+            result.append(spans)
+        return result
+
+    def bounded_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Every (start, end, pattern) occurrence with a word boundary on both sides,
+        overlaps included: where ``re.search(r'\\b' + pattern + r'\\b')`` succeeds for
+        each keyword pattern on its own, under re.IGNORECASE"""
+        delta = self.delta
+        out_start = self.out_start
+        out_items = self.out_items
+        lengths = self.lengths
+        kinds = self.kinds
+        num_classes = self.num_classes
+
+        translated = text.translate(self.class_table)
+        codes = translated.encode('latin-1') if num_classes <= 256 else map(ord, translated)
+
+        row = 0
+        for i, code in enumerate(codes):
+            entry = delta[row + code]
+            row = entry >> 1
+            if not entry & 1:
+                continue
+
+            end = i + 1
+            if not _is_boundary(text, end):
+                continue
+            state = row // num_classes
+            for j in range(out_start[state], out_start[state + 1]):
+                idx = out_items[j]
+                start = end - lengths[idx]
+                if kinds[idx] != MARKER and _is_boundary(text, start):
+                    yield start, end, idx
+
+    def findall(self, text: str) -> List[str]:
+        """Same strings regex.findall would return for the base words of the first list"""
+        return [text[start:end] for start, end, _ in self.find_spans(text)[0]]
+
+    def _keywords(self, text: str, spans: List[Tuple[int, int, int]], keywords: Set[str], base: int = 0):
+        for start, end, idx in spans:
+            surface = text[start - base:end - base].lower()
+            if surface == self.surfaces[idx]:
+                keywords.add(self.morphology[idx])
+            else:
+                # Case-folded match that lowercases differently (e.g. dotted I)
+                keywords.add(self._base_form(surface, self.channels[idx]))
+
+    def extract(self, text: str) -> Set[str]:
+        """Keywords of any list found in any form, mapped back to their base keyword"""
+        keywords: Set[str] = set()
+        for spans in self.find_spans(text):
+            self._keywords(text, spans, keywords)
+        return keywords
+
+    def scan(self, text: str) -> Tuple[Dict[str, Set[str]], Set[str]]:
+        """Keywords found per list, as ``extract`` reports them, and the markers present"""
+        scanner = KeywordScan(self)
+        markers = scanner.feed(text)
+        keywords, last = scanner.close()
+        return keywords, markers | last
+
+    def scanner(self) -> "KeywordScan":
+        return KeywordScan(self)
+
+
+class KeywordScan:
+    """One document scanned chunk by chunk, e.g. PDF page by page.
+
+    Automaton state carries across chunk boundaries, so the result is the
+    same as scanning the joined text. Only a short window is kept: the last
+    character fed is held back until the next chunk shows whether a word
+    ends there, and the ``max_length`` characters before it cover boundary
+    checks and the surfaces of spans not decided yet. A span is decided once
+    no match can start before it any more, and is reduced to its keyword
+    right away, so memory does not grow with the document.
+    """
+
+    def __init__(self, automaton: KeywordAutomaton):
+        self.automaton = automaton
+        self.window = ""
+        # Position of window[0] in the document, and how much of the window was scanned
+        self.base = 0
+        self.scanned = 0
+        self.row = 0
+        self.candidates = automaton._new_candidates()
+        # Per channel: end of the last span taken, before which no span can start
+        self.positions = [0] * len(self.candidates)
+        self.keywords: List[Set[str]] = [set() for _ in automaton.lists]
+
+    def feed(self, chunk: str) -> Set[str]:
+        """Scan the next chunk; returns the markers matched while doing so"""
+        if not chunk:
+            return set()
+        self.window += chunk
+        return self._advance(len(self.window) - 1)
+
+    def close(self) -> Tuple[Dict[str, Set[str]], Set[str]]:
+        """Finish the document: keywords per list, and the markers matched by the last step"""
+        markers = self._advance(len(self.window))
+        self._decide(None)
+        keywords = dict(zip(self.automaton.list_names, self.keywords))
+        return keywords, markers
+
+    def _advance(self, stop: int) -> Set[str]:
+        automaton = self.automaton
+        found = [False] * len(automaton.markers)
+        self.row = automaton._feed(self.window, self.scanned, stop, self.base, self.row, self.candidates, found)
+        self.scanned = stop
+        # Matches still to come end after stop, so they start after stop - max_length
+        self._decide(self.base + stop - automaton.max_length)
+
+        cut = max(0, stop - automaton.max_length - 1)
+        if cut:
+            self.window = self.window[cut:]
+            self.base += cut
+            self.scanned -= cut
+        return {name for name, present in zip(automaton.marker_names, found) if present}
+
+    def _decide(self, limit: Optional[int]):
+        """Take the leftmost non-overlapping spans among candidates starting at or before limit"""
+        automaton = self.automaton
+        per_list = len(automaton.suffixes)
+        for channel, best in enumerate(self.candidates):
+            if not best:
+                continue
+            ready = sorted(best) if limit is None else sorted(start for start in best if start <= limit)
+            spans = []
+            pos = self.positions[channel]
+            for start in ready:
+                _, end, idx = best.pop(start)
+                if start < pos:
+                    continue
+                spans.append((start, end, idx))
+                pos = end
+            self.positions[channel] = pos
+            automaton._keywords(self.window, spans, self.keywords[channel // per_list], self.base)
+
+
+# Least recently used automata are evicted, so word lists of replaced vocabularies do not pile up
+AUTOMATA_CACHE_SIZE = 64
+_automata: "OrderedDict[Tuple[Tuple[str, ...], Tuple[str, ...]], KeywordAutomaton]" = OrderedDict()
+_automata_lock = threading.Lock()
+
+
+def get_automaton(words: List[str], suffixes: Sequence[str] = ("",)) -> KeywordAutomaton:
+    key = (tuple(words), tuple(suffixes))
+    with _automata_lock:
+        automaton = _automata.get(key)
+        if automaton is not None:
+            _automata.move_to_end(key)
+            return automaton
+    automaton = KeywordAutomaton({"": words}, suffixes)
+    with _automata_lock:
+        _automata[key] = automaton
+        while len(_automata) > AUTOMATA_CACHE_SIZE:
+            _automata.popitem(last=False)
+    return automaton
@@ -1,24 +1,45 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 import asyncio
+import json
 from contextlib import asynccontextmanager
 
-from parser import get_resume_parser, get_job_parser
-from database_production import init_db, ResumeDB, JobDB, MatchDB, UserDB, db_pool
-from jobalytics_matcher import get_matcher
+from database_production import init_db, ResumeDB, JobDB, MatchDB, UserDB, MatchCacheDB, VocabularyDB, IngestionDB, db_pool
+from jobalytics_matcher import JobalyticsMatcher, get_matcher, reload_vocabulary, use_vocabulary, ProfileMatrix, text_hash
+from match_cache import match_cache
+from job_index import JobIndex, JobIndexRegistry
+from document_analyzer import analyze_upload_async, store_upload, upload_result
+from job_ingestion import ingest_job_feed, iter_feed_records, read_chunks
+from worker_pool import (
+    worker_pool, WorkerPoolBusy, analyze_resume_pdf, analyze_resume_text, analyze_job,
+    build_profile, build_job_profile, build_profiles, build_job_profiles, match_profile, count_pdf_pages, extract_pdf_text_parallel
+)
+from deadline import Deadline
 from config import settings
 from logger import logger
-from auth import verify_token, create_access_token, get_password_hash, verify_password, TokenData
+from auth import verify_token, verify_admin, create_access_token, get_password_hash, verify_password, TokenData
 from rate_limiter import rate_limiter
-from validators import validate_pdf_upload, sanitize_string, validate_email
+from validators import (
+    validate_pdf_upload, sanitize_string, validate_email, SpooledUpload, is_archive_upload, open_pdf_archive,
+    spool_job_feed
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting ResumSync API")
     init_db()
+    get_matcher()
+    worker_pool.start()
+    if settings.match_cache_persistent:
+        purged = MatchCacheDB.purge_expired(settings.match_cache_ttl_seconds)
+        logger.info(f"Purged {purged} expired match cache entries")
+    watcher = asyncio.create_task(watch_vocabulary())
     yield
+    watcher.cancel()
+    worker_pool.shutdown()
     db_pool.close_all()
     logger.info("Shutting down ResumSync API")
 
@@ -33,9 +54,7 @@ app.add_middleware(
     max_age=3600
 )
 
-resume_parser = get_resume_parser()
-job_parser = get_job_parser()
-matcher = get_matcher()
+job_indexes = JobIndexRegistry(settings.job_index_max_users)
 
 class RegisterRequest(BaseModel):
     email: EmailStr
@@ -55,6 +74,223 @@ class MatchJobRequest(BaseModel):
     resume_id: int
     job_description: str
 
+async def wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(0.25)
+
+async def run_cpu(fn, *args, size: int, deadline: Optional[Deadline] = None, request: Optional[Request] = None):
+    """Run CPU-bound work on the worker pool within the request's deadline.
+    
+    Answers 503 when the pool is saturated. If the client disconnects first,
+    the work is abandoned so it stops at its next deadline check.
+    """
+    deadline = deadline or Deadline(settings.api_timeout_seconds)
+    return await guard_pool_work(worker_pool.run(fn, *args, size=size, deadline=deadline), request)
+
+async def guard_pool_work(coro, request: Optional[Request] = None):
+    """Await pool work, abandoning it if the client disconnects and answering 503 if the pool is full"""
+    work = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request)) if request else None
+    try:
+        if watcher:
+            await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not work.done():
+                logger.info("Client disconnected, abandoning work")
+                raise HTTPException(status_code=499, detail="Client closed request")
+        return await work
+    except WorkerPoolBusy:
+        logger.warning("Worker pool saturated, rejecting request")
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly", headers={"Retry-After": "1"})
+    finally:
+        if not work.done():
+            work.cancel()
+        if watcher:
+            watcher.cancel()
+
+async def run_in_thread(fn, *args, deadline: Deadline, request: Optional[Request] = None):
+    """Run blocking work that checks the deadline on a thread.
+    
+    The deadline is the only time budget: if the client disconnects first,
+    the deadline is cancelled so the work stops at its next check.
+    """
+    try:
+        return await guard_pool_work(asyncio.to_thread(fn, *args, deadline), request)
+    except HTTPException:
+        deadline.cancel()
+        raise
+
+def clear_vocabulary_caches():
+    """Drop in-memory results of older vocabularies; stored profiles are rebuilt lazily"""
+    match_cache.clear()
+    job_indexes.clear()
+
+async def watch_vocabulary():
+    """Follow vocabulary reloads made through any worker via the vocabulary_state row"""
+    try:
+        seen = await asyncio.to_thread(VocabularyDB.get_version)
+    except Exception as e:
+        logger.warning(f"Vocabulary state unavailable: {e}")
+        seen = None
+    while True:
+        await asyncio.sleep(settings.vocabulary_poll_seconds)
+        try:
+            version = await asyncio.to_thread(VocabularyDB.get_version)
+            if version is None or version == seen:
+                continue
+            seen = version
+            if version != get_matcher().version:
+                await asyncio.to_thread(use_vocabulary, version)
+                clear_vocabulary_caches()
+        except Exception as e:
+            logger.warning(f"Vocabulary update check failed: {e}")
+
+async def analyze_resume_upload(upload: SpooledUpload, matcher: JobalyticsMatcher, deadline: Deadline, request: Optional[Request]) -> dict:
+    """Analyze an uploaded PDF: parsed fields and keyword profile in one record.
+    
+    Long PDFs are extracted in page ranges across the worker pool; others are
+    parsed by one worker that extracts keywords as each page is decoded.
+    Workers read the spooled upload by path.
+    """
+    if worker_pool.size > 1:
+        page_count = await run_cpu(count_pdf_pages, upload.path, size=0, deadline=deadline, request=request)
+        if page_count >= settings.pdf_parallel_min_pages:
+            text = await guard_pool_work(
+                extract_pdf_text_parallel(worker_pool, upload.path, upload.size, page_count, deadline,
+                                          settings.pdf_page_budget_seconds),
+                request
+            )
+            return await run_cpu(analyze_resume_text, text, matcher.version, size=len(text), deadline=deadline, request=request)
+    return await run_cpu(
+        analyze_resume_pdf, upload.path, matcher.version, size=upload.size, deadline=deadline, request=request
+    )
+
+async def load_upload_analysis(upload: SpooledUpload, matcher: JobalyticsMatcher, deadline: Deadline, request: Optional[Request]) -> dict:
+    """Analysis record of an upload, reused when the same PDF was parsed before"""
+    async def rebuild(text: str) -> dict:
+        return await run_cpu(build_profile, text, matcher.version, size=len(text), deadline=deadline, request=request)
+    
+    return await analyze_upload_async(upload.content_hash, matcher,
+                                      lambda: analyze_resume_upload(upload, matcher, deadline, request), rebuild)
+
+async def load_resume_profile(matcher: JobalyticsMatcher, resume_id: int, user_id: int,
+                              deadline: Optional[Deadline] = None, request: Optional[Request] = None) -> Optional[dict]:
+    """Load a resume's keyword profile, rebuilding it if missing or stale"""
+    resume = await asyncio.to_thread(ResumeDB.get_resume_profile, resume_id, user_id)
+    if not resume:
+        return None
+    
+    profile = resume['keyword_profile']
+    if not matcher.is_current_profile(profile):
+        resume_data = await asyncio.to_thread(ResumeDB.get_resume, resume_id, user_id)
+        if not resume_data:
+            return None
+        profile = await run_cpu(build_profile, resume_data['text'], matcher.version, size=len(resume_data['text']),
+                                deadline=deadline, request=request)
+        await asyncio.to_thread(ResumeDB.update_resume_profile, resume_id, user_id, profile)
+        logger.info(f"Keyword profile rebuilt for resume {resume_id}")
+    return profile
+
+async def rebuild_profiles(task: Callable, ids: List[int], load_texts: Callable, store: Callable,
+                           matcher: JobalyticsMatcher, deadline: Optional[Deadline] = None,
+                           request: Optional[Request] = None) -> Dict[int, dict]:
+    """Rebuild stale profiles in batches spread over the worker pool.
+    
+    Each batch is profiled in one worker task and stored with one UPDATE as
+    soon as it is done, so batches finished before the deadline are kept.
+    """
+    deadline = deadline or Deadline(settings.api_timeout_seconds)
+    slots = asyncio.Semaphore(max(worker_pool.size, 1))
+    rebuilt = {}
+    
+    async def rebuild(batch: List[int]):
+        async with slots:
+            texts = await asyncio.to_thread(load_texts, batch)
+            batch = [item_id for item_id in batch if item_id in texts]
+            profiles = await run_cpu(task, [texts[item_id] for item_id in batch], matcher.version,
+                                     size=sum(len(texts[item_id]) for item_id in batch), deadline=deadline, request=request)
+            profiles = dict(zip(batch, profiles))
+            await asyncio.to_thread(store, profiles)
+            rebuilt.update(profiles)
+    
+    size = settings.profile_rebuild_batch_size
+    batches = [asyncio.ensure_future(rebuild(ids[i:i + size])) for i in range(0, len(ids), size)]
+    try:
+        await asyncio.gather(*batches)
+    finally:
+        for batch in batches:
+            batch.cancel()
+    return rebuilt
+
+async def load_resume_profiles(matcher: JobalyticsMatcher, user_id: int, limit: int,
+                               deadline: Optional[Deadline] = None, request: Optional[Request] = None) -> List[dict]:
+    """Load a user's resumes with keyword profiles, rebuilding missing or stale ones"""
+    resumes = await asyncio.to_thread(ResumeDB.get_resume_profiles, user_id, limit=limit)
+    stale = [resume['id'] for resume in resumes if not matcher.is_current_profile(resume['keyword_profile'])]
+    if not stale:
+        return resumes
+    
+    rebuilt = await rebuild_profiles(
+        build_profiles, stale,
+        lambda ids: ResumeDB.get_resume_texts(ids, user_id),
+        lambda profiles: ResumeDB.update_resume_profiles(user_id, profiles),
+        matcher, deadline, request
+    )
+    logger.info(f"Keyword profiles rebuilt for {len(rebuilt)} resumes of user {user_id}")
+    for resume in resumes:
+        resume['keyword_profile'] = rebuilt.get(resume['id'], resume['keyword_profile'])
+    # A resume deleted meanwhile has nothing to rebuild from
+    return [resume for resume in resumes if matcher.is_current_profile(resume['keyword_profile'])]
+
+async def load_job_profile(matcher: JobalyticsMatcher, job_id: int, user_id: int,
+                           deadline: Optional[Deadline] = None, request: Optional[Request] = None) -> Optional[dict]:
+    """Load a job's keyword profile, rebuilding it if missing or stale"""
+    job = await asyncio.to_thread(JobDB.get_job_profile, job_id, user_id)
+    if not job:
+        return None
+    
+    profile = job['keyword_profile']
+    if not matcher.is_current_profile(profile):
+        job_data = await asyncio.to_thread(JobDB.get_job, job_id, user_id)
+        if not job_data:
+            return None
+        profile = await run_cpu(build_job_profile, job_data['description'], matcher.version, size=len(job_data['description']),
+                                deadline=deadline, request=request)
+        await asyncio.to_thread(JobDB.update_job_profile, job_id, user_id, profile)
+        logger.info(f"Keyword profile rebuilt for job {job_id}")
+    return profile
+
+async def load_job_profiles(matcher: JobalyticsMatcher, user_id: int, limit: int,
+                            deadline: Optional[Deadline] = None, request: Optional[Request] = None) -> List[dict]:
+    """Load a user's jobs with keyword profiles, rebuilding missing or stale ones"""
+    jobs = await asyncio.to_thread(JobDB.get_job_profiles, user_id, limit=limit)
+    stale = [job['id'] for job in jobs if not matcher.is_current_profile(job['keyword_profile'])]
+    if not stale:
+        return jobs
+    
+    rebuilt = await rebuild_profiles(
+        build_job_profiles, stale,
+        lambda ids: JobDB.get_job_descriptions(ids, user_id),
+        lambda profiles: JobDB.update_job_profiles(user_id, profiles),
+        matcher, deadline, request
+    )
+    logger.info(f"Keyword profiles rebuilt for {len(rebuilt)} jobs of user {user_id}")
+    for job in jobs:
+        if job['id'] in rebuilt:
+            job['keyword_profile'] = rebuilt[job['id']]
+            job['domain'] = rebuilt[job['id']]['domain']
+    return [job for job in jobs if matcher.is_current_profile(job['keyword_profile'])]
+
+async def load_job_index(matcher: JobalyticsMatcher, user_id: int, deadline: Optional[Deadline] = None,
+                         request: Optional[Request] = None) -> JobIndex:
+    """Cached inverted index over a user's jobs, rebuilt when the jobs or the vocabulary changed"""
+    fingerprint = await asyncio.to_thread(JobDB.get_jobs_fingerprint, user_id)
+    index = job_indexes.get(user_id, fingerprint, matcher.version)
+    if index is None:
+        jobs = await load_job_profiles(matcher, user_id, settings.max_jobs_scored, deadline, request)
+        index = await asyncio.to_thread(JobIndex, matcher, jobs, fingerprint)
+        job_indexes.put(user_id, index)
+    return index
+
 @app.post("/api/auth/register")
 async def register(request: RegisterRequest):
     try:
@@ -100,40 +336,39 @@ async def login(request: LoginRequest):
 async def upload_resume(
     request: Request,
     file: UploadFile = File(...),
+    queued: bool = Query(False, alias="async"),
     token: TokenData = Depends(verify_token)
 ):
     await rate_limiter.check_rate_limit(request)
     
+    deadline = Deadline(settings.api_timeout_seconds)
+    matcher = get_matcher()
+    filename = sanitize_string(file.filename, 255)
     try:
-        content = await validate_pdf_upload(file)
-        
-        # Parse with timeout
-        parsed_data = await asyncio.wait_for(
-            asyncio.to_thread(resume_parser.parse_resume, content),
-            timeout=settings.api_timeout_seconds
-        )
-        
-        filename = sanitize_string(file.filename, 255)
-        
-        resume_id = ResumeDB.insert_resume(
-            user_id=token.user_id,
-            filename=filename,
-            text=parsed_data['text'],
-            embedding=None,
-            skills=parsed_data['skills'],
-            experience_years=parsed_data['experience_years'],
-            education=parsed_data['education']
-        )
+        with await validate_pdf_upload(file) as upload:
+            # The same PDF uploaded again by this user is the resume it already has
+            resume = await asyncio.to_thread(ResumeDB.get_resume_by_content, token.user_id, upload.content_hash)
+            if resume is not None:
+                logger.info(f"Resume upload by user {token.user_id} duplicates resume {resume['id']}")
+                return upload_result(resume['id'], resume['filename'], resume, True)
+            
+            if queued:
+                # Ingestion workers parse and store it; the client polls the task
+                content = await asyncio.to_thread(upload.read)
+                task_id = await asyncio.to_thread(IngestionDB.enqueue, token.user_id, filename, content, upload.content_hash)
+                logger.info(f"Resume upload queued: task {task_id} by user {token.user_id}")
+                return JSONResponse(status_code=202, content={
+                    "task_id": task_id,
+                    "status": "queued",
+                    "status_url": f"/api/resume/tasks/{task_id}"
+                })
+            
+            # Parsing and extraction share one deadline
+            analysis = await load_upload_analysis(upload, matcher, deadline, request)
         
-        logger.info(f"Resume uploaded: {resume_id} by user {token.user_id}")
-        return {
-            "id": resume_id,
-            "filename": filename,
-            "text_length": len(parsed_data['text']),
-            "skills": parsed_data['skills'],
-            "experience_years": parsed_data['experience_years'],
-            "education": parsed_data['education']
-        }
+        result = await asyncio.to_thread(store_upload, token.user_id, filename, analysis, upload.content_hash)
+        logger.info(f"Resume uploaded: {result['id']} by user {token.user_id}")
+        return result
     except asyncio.TimeoutError:
         logger.error(f"Resume upload timeout for user {token.user_id}")
         raise HTTPException(status_code=408, detail="Processing timeout")
@@ -143,6 +378,155 @@ async def upload_resume(
         logger.error(f"Resume upload error: {e}")
         raise HTTPException(status_code=500, detail="Error processing PDF")
 
+async def import_bulk_entry(index: int, filename: str, spool: Callable, user_id: int, matcher: JobalyticsMatcher,
+                            slots: asyncio.Semaphore) -> dict:
+    """Validate and analyze one file of a bulk import; failures are part of the outcome"""
+    outcome = {"index": index, "filename": filename}
+    async with slots:
+        try:
+            with await spool() as upload:
+                resume_id = await asyncio.to_thread(ResumeDB.find_resume_by_content, user_id, upload.content_hash)
+                if resume_id is not None:
+                    return {**outcome, "status": "duplicate", "id": resume_id}
+                analysis = await load_upload_analysis(upload, matcher, Deadline(settings.api_timeout_seconds), None)
+                return {**outcome, "status": "parsed", "content_hash": upload.content_hash, "analysis": analysis}
+        except HTTPException as e:
+            return {**outcome, "status": "failed", "error": e.detail}
+        except asyncio.TimeoutError:
+            return {**outcome, "status": "failed", "error": "Processing timeout"}
+        except Exception as e:
+            logger.error(f"Bulk import of {filename} failed: {e}")
+            return {**outcome, "status": "failed", "error": "Error processing PDF"}
+
+def insert_bulk_batch(user_id: int, batch: List[dict], imported: dict) -> List[dict]:
+    """Insert a batch of parsed files with multi-row INSERTs and return their outcomes.
+    
+    `imported` maps the content hash of every resume stored so far in this
+    import to its id and filename, so a PDF that appears twice is stored once.
+    """
+    rows = {}
+    for outcome in batch:
+        content_hash = outcome['content_hash']
+        if content_hash not in imported and content_hash not in rows:
+            rows[content_hash] = {
+                **outcome['analysis'],
+                'filename': sanitize_string(outcome['filename'], 255),
+                'content_hash': content_hash
+            }
+    ids = ResumeDB.insert_resumes(user_id, list(rows.values()))
+    for content_hash, row in rows.items():
+        if content_hash in ids:
+            imported[content_hash] = (ids[content_hash], row['filename'])
+            continue
+        # Stored by a concurrent upload of the same PDF since it was checked
+        resume = ResumeDB.get_resume_by_content(user_id, content_hash)
+        if resume is not None:
+            imported[content_hash] = (resume['id'], resume['filename'])
+    
+    results = []
+    for outcome in batch:
+        content_hash, analysis = outcome.pop('content_hash'), outcome.pop('analysis')
+        if content_hash not in imported:
+            results.append({**outcome, "status": "failed", "error": "Error saving resume"})
+            continue
+        resume_id, filename = imported[content_hash]
+        duplicate = ids.pop(content_hash, None) is None
+        results.append({**outcome, **upload_result(resume_id, filename, analysis, duplicate),
+                        "status": "duplicate" if duplicate else "imported"})
+    return results
+
+async def stream_bulk_import(entries: List[Tuple[str, Callable]], user_id: int) -> AsyncIterator[str]:
+    """Import files as NDJSON progress: one line per file as it settles, then a summary.
+    
+    As many files as the worker pool has processes are validated and parsed
+    at once. Parsed files are stored in batches of BULK_INSERT_BATCH_SIZE.
+    """
+    matcher = get_matcher()
+    slots = asyncio.Semaphore(max(worker_pool.size, 1))
+    tasks = [
+        asyncio.ensure_future(import_bulk_entry(index, filename, spool, user_id, matcher, slots))
+        for index, (filename, spool) in enumerate(entries)
+    ]
+    counts = {"imported": 0, "duplicate": 0, "failed": 0}
+    imported, batch = {}, []
+    
+    def report(outcomes: List[dict]) -> str:
+        for outcome in outcomes:
+            counts[outcome['status']] += 1
+        return "".join(json.dumps(outcome) + "\n" for outcome in outcomes)
+    
+    async def flush() -> str:
+        try:
+            results = await asyncio.to_thread(insert_bulk_batch, user_id, batch, imported)
+        except Exception as e:
+            logger.error(f"Bulk import insert failed: {e}")
+            results = [{"index": o['index'], "filename": o['filename'], "status": "failed", "error": "Error saving resume"}
+                       for o in batch]
+        batch.clear()
+        return report(results)
+    
+    try:
+        yield json.dumps({"status": "started", "total": len(entries)}) + "\n"
+        for next_done in asyncio.as_completed(tasks):
+            outcome = await next_done
+            if outcome['status'] != "parsed":
+                yield report([outcome])
+                continue
+            batch.append(outcome)
+            if len(batch) >= settings.bulk_insert_batch_size:
+                yield await flush()
+        if batch:
+            yield await flush()
+        logger.info(f"Bulk import by user {user_id}: {counts}")
+        yield json.dumps({"status": "finished", "total": len(entries), **counts}) + "\n"
+    finally:
+        # The client went away: stop parsing the rest
+        for task in tasks:
+            task.cancel()
+
+@app.post("/api/resume/bulk")
+async def bulk_import_resumes(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    token: TokenData = Depends(verify_token)
+):
+    """Import many PDFs at once, sent as separate files, zip archives or both"""
+    await rate_limiter.check_rate_limit(request)
+    
+    entries = []
+    for file in files:
+        if is_archive_upload(file):
+            # Archive entries are decompressed and validated on a thread when their turn comes
+            archive = await asyncio.to_thread(open_pdf_archive, file)
+            entries.extend((name, lambda spool=spool: asyncio.to_thread(spool)) for name, spool in archive)
+        else:
+            entries.append((file.filename, lambda file=file: validate_pdf_upload(file)))
+    if not entries:
+        raise HTTPException(status_code=400, detail="No files to import")
+    if len(entries) > settings.max_bulk_files:
+        raise HTTPException(status_code=413, detail=f"Too many files. Maximum: {settings.max_bulk_files}")
+    
+    logger.info(f"Bulk import of {len(entries)} files by user {token.user_id}")
+    return StreamingResponse(stream_bulk_import(entries, token.user_id), media_type="application/x-ndjson")
+
+@app.get("/api/resume/tasks/{task_id}")
+async def get_resume_task(task_id: int, token: TokenData = Depends(verify_token)):
+    task = IngestionDB.get_task(task_id, token.user_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    response = {
+        "task_id": task['id'],
+        "status": task['status'],
+        "filename": task['filename'],
+        "attempts": task['attempts']
+    }
+    if task['status'] == 'done':
+        response["result"] = task['result']
+    elif task['status'] == 'failed':
+        response["error"] = task['error']
+    return response
+
 @app.post("/api/jobs")
 async def add_job(
     request: Request,
@@ -151,16 +535,16 @@ async def add_job(
 ):
     await rate_limiter.check_rate_limit(request)
     
+    deadline = Deadline(settings.api_timeout_seconds)
+    matcher = get_matcher()
     try:
         title = sanitize_string(job.title, 255)
         company = sanitize_string(job.company, 255)
         description = sanitize_string(job.description, 50000)
         url = sanitize_string(job.url, 2048) if job.url else None
         
-        parsed_job = await asyncio.wait_for(
-            asyncio.to_thread(job_parser.parse_job_description, description),
-            timeout=settings.api_timeout_seconds
-        )
+        analysis = await run_cpu(analyze_job, description, matcher.version, size=len(description), deadline=deadline, request=request)
+        keyword_profile = analysis['keyword_profile']
         
         job_id = JobDB.insert_job(
             user_id=token.user_id,
@@ -169,25 +553,57 @@ async def add_job(
             description=description,
             url=url,
             embedding=None,
-            required_skills=parsed_job['required_skills'],
-            experience_required=parsed_job['experience_required'],
-            education_required=parsed_job['education_required']
+            required_skills=analysis['skills'],
+            experience_required=analysis['experience_years'],
+            education_required=analysis['education'],
+            keyword_profile=keyword_profile
         )
         
+        job_indexes.add_job(token.user_id, {
+            "id": job_id,
+            "title": title,
+            "company": company,
+            "description": description[:200],
+            "url": url,
+            "keyword_profile": keyword_profile
+        })
+        
         logger.info(f"Job added: {job_id} by user {token.user_id}")
         return {
             "id": job_id,
             "title": title,
-            "required_skills": parsed_job['required_skills'],
-            "experience_required": parsed_job['experience_required']
+            "required_skills": analysis['skills'],
+            "experience_required": analysis['experience_years']
         }
     except asyncio.TimeoutError:
         logger.error(f"Job add timeout for user {token.user_id}")
         raise HTTPException(status_code=408, detail="Processing timeout")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Job add error: {e}")
         raise HTTPException(status_code=500, detail="Error adding job")
 
+async def stream_job_feed(feed, feed_format: str, user_id: int, source: Optional[str]) -> AsyncIterator[str]:
+    with feed:
+        records = iter_feed_records(read_chunks(feed), feed_format)
+        async for progress in ingest_job_feed(records, user_id, worker_pool, source):
+            yield json.dumps(progress) + "\n"
+
+@app.post("/api/jobs/bulk")
+async def bulk_ingest_jobs(
+    request: Request,
+    feed_format: str = Query("jsonl", alias="format", pattern="^(jsonl|csv)$"),
+    source: Optional[str] = Query(None, max_length=255),
+    token: TokenData = Depends(verify_token)
+):
+    """Add the jobs of a JSONL or CSV feed sent as the request body, streaming NDJSON progress"""
+    await rate_limiter.check_rate_limit(request)
+    
+    feed = await spool_job_feed(request)
+    logger.info(f"Job feed ingestion by user {token.user_id} ({feed_format}, source {source})")
+    return StreamingResponse(stream_job_feed(feed, feed_format, token.user_id, source), media_type="application/x-ndjson")
+
 @app.get("/api/matches/{resume_id}")
 async def get_matches(
     request: Request,
@@ -197,57 +613,56 @@ async def get_matches(
 ):
     await rate_limiter.check_rate_limit(request)
     
+    deadline = Deadline(settings.api_timeout_seconds)
     try:
         if limit > settings.max_jobs_per_request:
             limit = settings.max_jobs_per_request
         
-        resume_data = ResumeDB.get_resume(resume_id, token.user_id)
-        if not resume_data:
+        matcher = get_matcher()
+        resume_profile = await load_resume_profile(matcher, resume_id, token.user_id, deadline, request)
+        if not resume_profile:
             raise HTTPException(status_code=404, detail="Resume not found")
         
-        jobs = JobDB.get_all_jobs(token.user_id, limit=settings.max_jobs_per_request)
-        matches = []
+        index = await load_job_index(matcher, token.user_id, deadline, request)
         
-        async def process_job(job):
-            result = await asyncio.to_thread(
-                matcher.get_match_result,
-                resume_data['text'],
-                job['description']
-            )
+        # Max-score pruning over the inverted index skips jobs that cannot make the top-k
+        top = await run_in_thread(index.top_k, resume_profile, limit, deadline=deadline, request=request)
+        
+        matches = []
+        for job_id, score in top:
+            job = index.jobs.get(job_id)
+            if job is None:
+                continue
+            # Keyword lists are decoded only for the results returned
+            result = matcher.match_profiles(resume_profile, job['keyword_profile'])
             
-            MatchDB.save_match_result(
+            await asyncio.to_thread(
+                MatchDB.save_match_result,
                 resume_id=resume_id,
                 job_id=job['id'],
-                overall_score=result['score'],
+                overall_score=score,
                 skills_score=0,
                 experience_score=0,
                 education_score=0,
-                semantic_score=result['score'],
+                semantic_score=score,
                 matched_skills=result['matches'],
                 missing_skills=result['unmatches'],
                 total_required=len(result['unmatches']) + len(result['matches'])
             )
             
-            return {
+            matches.append({
                 "job_id": job['id'],
                 "title": job['title'],
                 "company": job['company'],
-                "score": result['score'],
+                "score": score,
                 "matched_skills": result['matches'],
                 "missing_skills": result['unmatches'],
-                "description": job['description'][:200],
+                "description": job['description'],
                 "url": job['url']
-            }
-        
-        tasks = [process_job(job) for job in jobs]
-        matches = await asyncio.wait_for(
-            asyncio.gather(*tasks),
-            timeout=settings.api_timeout_seconds
-        )
+            })
         
-        matches.sort(key=lambda x: x['score'], reverse=True)
         logger.info(f"Matches calculated for resume {resume_id}")
-        return matches[:limit]
+        return matches
     except asyncio.TimeoutError:
         logger.error(f"Matches timeout for resume {resume_id}")
         raise HTTPException(status_code=408, detail="Processing timeout")
@@ -257,6 +672,58 @@ async def get_matches(
         logger.error(f"Matches error: {e}")
         raise HTTPException(status_code=500, detail="Error calculating matches")
 
+@app.get("/api/jobs/{job_id}/matches")
+async def get_resume_matches(
+    request: Request,
+    job_id: int,
+    limit: int = 10,
+    offset: int = 0,
+    token: TokenData = Depends(verify_token)
+):
+    await rate_limiter.check_rate_limit(request)
+    
+    deadline = Deadline(settings.api_timeout_seconds)
+    try:
+        limit = max(0, min(limit, settings.max_resumes_per_request))
+        offset = max(0, offset)
+        
+        matcher = get_matcher()
+        job_profile = await load_job_profile(matcher, job_id, token.user_id, deadline, request)
+        if not job_profile:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        resumes = await load_resume_profiles(matcher, token.user_id, settings.max_resumes_scored, deadline, request)
+        
+        # One vectorized pass over every stored resume profile
+        def rank(deadline: Deadline):
+            matrix = ProfileMatrix([resume['keyword_profile'] for resume in resumes], matcher.vocabulary.bitset_words, deadline)
+            return matcher.rank_resumes(matrix, job_profile, offset + limit, deadline)
+        
+        top = await run_in_thread(rank, deadline=deadline, request=request)
+        
+        matches = []
+        for i, score in top[offset:]:
+            resume = resumes[i]
+            result = matcher.match_profiles(resume['keyword_profile'], job_profile)
+            matches.append({
+                "resume_id": resume['id'],
+                "filename": resume['filename'],
+                "score": score,
+                "matched_skills": result['matches'],
+                "missing_skills": result['unmatches']
+            })
+        
+        logger.info(f"Resume matches calculated for job {job_id}")
+        return matches
+    except asyncio.TimeoutError:
+        logger.error(f"Resume matches timeout for job {job_id}")
+        raise HTTPException(status_code=408, detail="Processing timeout")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Resume matches error: {e}")
+        raise HTTPException(status_code=500, detail="Error calculating matches")
+
 @app.get("/api/resumes")
 async def list_resumes(
     request: Request,
@@ -288,6 +755,7 @@ async def delete_job(
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     JobDB.delete_job(job_id, token.user_id)
+    job_indexes.remove_job(token.user_id, job_id)
     logger.info(f"Job {job_id} deleted by user {token.user_id}")
     return {"message": "Job deleted successfully"}
 
@@ -313,17 +781,21 @@ async def match_job(
 ):
     await rate_limiter.check_rate_limit(request)
     
+    deadline = Deadline(settings.api_timeout_seconds)
     try:
-        resume_data = ResumeDB.get_resume(match_request.resume_id, token.user_id)
-        if not resume_data:
+        matcher = get_matcher()
+        resume_profile = await load_resume_profile(matcher, match_request.resume_id, token.user_id, deadline, request)
+        if not resume_profile:
             raise HTTPException(status_code=404, detail="Resume not found")
         
         description = sanitize_string(match_request.job_description, 50000)
         
-        result = await asyncio.wait_for(
-            asyncio.to_thread(matcher.get_match_result, resume_data['text'], description),
-            timeout=settings.api_timeout_seconds
-        )
+        # Revisiting the same posting is served from the cache
+        cache_key = match_cache.key(matcher.version, resume_profile['text_hash'], text_hash(description))
+        result = await asyncio.to_thread(match_cache.get, cache_key)
+        if result is None:
+            result = await run_cpu(match_profile, resume_profile, description, matcher.version, size=len(description), deadline=deadline, request=request)
+            await asyncio.to_thread(match_cache.put, cache_key, result)
         
         return {
             "score": result['score'],
@@ -339,6 +811,31 @@ async def match_job(
         logger.error(f"Match job error: {e}")
         raise HTTPException(status_code=500, detail="Error matching job")
 
+@app.get("/api/admin/vocabulary")
+async def vocabulary_status(token: TokenData = Depends(verify_admin)):
+    return {"version": get_matcher().version}
+
+@app.post("/api/admin/vocabulary/reload")
+async def reload_vocabularies(token: TokenData = Depends(verify_admin)):
+    """Re-read the keyword lists and swap them in without a restart"""
+    previous = get_matcher().version
+    try:
+        matcher = await asyncio.to_thread(reload_vocabulary)
+    except Exception as e:
+        logger.error(f"Vocabulary reload failed: {e}")
+        raise HTTPException(status_code=400, detail="Vocabulary could not be loaded")
+    
+    changed = matcher.version != previous
+    if changed:
+        clear_vocabulary_caches()
+        # Other workers pick the new version up on their next poll
+        await asyncio.to_thread(VocabularyDB.set_version, matcher.version)
+        if settings.match_cache_persistent:
+            purged = await asyncio.to_thread(MatchCacheDB.purge_other_versions, matcher.version)
+            logger.info(f"Purged {purged} match cache entries of older vocabularies")
+    logger.info(f"Vocabulary reload by user {token.user_id}: {previous} -> {matcher.version}")
+    return {"previous_version": previous, "version": matcher.version, "changed": changed}
+
 
 
 @app.get("/")
@@ -356,7 +853,7 @@ async def health():
         with db_pool.get_connection() as conn:
             cur = conn.cursor()
             cur.execute("SELECT 1")
-        return {"status": "healthy", "database": "connected"}
+        return {"status": "healthy", "database": "connected", "match_cache": match_cache.stats(), "worker_pool": worker_pool.stats()}
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
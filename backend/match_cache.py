@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from config import settings
+from logger import logger
+from database_production import MatchCacheDB
+
+
+def _entry_size(result: Dict) -> int:
+    """Rough in-memory size of a cached match result in bytes"""
+    return 200 + sum(60 + len(kw) for kw in result['matches'] + result['unmatches'])
+
+
+class MatchCache:
+    """LRU cache of match results keyed by content hashes and vocabulary version.
+
+    Entries expire after ``ttl_seconds``, and the cache evicts least recently
+    used entries once it holds more than ``max_entries`` results or roughly
+    ``max_bytes`` of them. When ``persistent`` is set, misses fall through to
+    the match_cache table so results survive restarts and are shared by
+    workers.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int, persistent: bool = False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.entries: "OrderedDict[str, Tuple[float, int, Dict]]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(version: str, resume_hash: str, job_hash: str) -> str:
+        return f"{version}:{resume_hash}:{job_hash}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                stored_at, size, result = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                self._evict(key)
+
+        result = self._get_persistent(key)
+        with self.lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.persistent_hits += 1
+            self._put_local(key, result, now)
+            return result
+
+    def put(self, key: str, result: Dict):
+        with self.lock:
+            self._put_local(key, result, time.monotonic())
+        self._put_persistent(key, result)
+
+    def _put_local(self, key: str, result: Dict, stored_at: float):
+        if key in self.entries:
+            self._evict(key)
+        size = _entry_size(result)
+        self.entries[key] = (stored_at, size, result)
+        self.size_bytes += size
+        while self.entries and (len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes):
+            self._evict(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _evict(self, key: str):
+        _, size, _ = self.entries.pop(key)
+        self.size_bytes -= size
+
+    def _get_persistent(self, key: str) -> Optional[Dict]:
+        if not self.persistent:
+            return None
+        try:
+            return MatchCacheDB.get(key, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Persistent match cache read failed: {e}")
+            return None
+
+    def _put_persistent(self, key: str, result: Dict):
+        if not self.persistent:
+            return
+        try:
+            MatchCacheDB.put(key, result)
+        except Exception as e:
+            logger.warning(f"Persistent match cache write failed: {e}")
+
+    def clear(self):
+        """Drop every in-memory entry, e.g. after a vocabulary swap"""
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "size_bytes": self.size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent_hits": self.persistent_hits,
+                "evictions": self.evictions,
+            }
+
+
+match_cache = MatchCache(
+    max_entries=settings.match_cache_max_entries,
+    max_bytes=settings.match_cache_max_mb * 1024 * 1024,
+    ttl_seconds=settings.match_cache_ttl_seconds,
+    persistent=settings.match_cache_persistent
+)
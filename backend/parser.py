@@ -1,8 +1,216 @@
 import re
+import threading
+import time
 import pdfplumber
-from typing import Dict, List, Set
+from pdfminer.pdftypes import resolve1
+from typing import Dict, Iterable, Iterator, List, Set, Optional, Union
 import io
 
+from config import settings
+from deadline import Deadline, check
+from keyword_engine import get_automaton
+from logger import logger
+
+try:
+    import pypdfium2
+    from pypdfium2 import PdfiumError
+except ImportError:
+    # pdfplumber depends on pypdfium2; without it everything goes through pdfplumber
+    pypdfium2 = None
+    PdfiumError = ()
+
+def strip_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """Chunks of "".join(chunks).strip(), without joining them"""
+    started = False
+    pending = ""
+    for chunk in chunks:
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        body = chunk.rstrip()
+        if body:
+            # Whitespace is only passed on once more text follows it
+            yield pending + body
+            pending = chunk[len(body):]
+        else:
+            pending += chunk
+
+def join_pages(page_texts: Iterable[str]) -> Iterator[str]:
+    """Chunks of the document text: non-empty pages joined by newlines, stripped"""
+    def pieces():
+        first = True
+        for page_text in page_texts:
+            if page_text:
+                if not first:
+                    yield "\n"
+                first = False
+                yield page_text
+    return strip_chunks(pieces())
+
+# PDF text extraction backends. pdfium reads the text layer directly and is
+# far cheaper than pdfplumber's layout analysis; pdfplumber stays as the
+# fallback for pages whose fast text looks wrong.
+
+# Bump when the same PDF would parse to different text or fields, so cached
+# parse output of older parsers is not reused
+PARSER_FORMAT = 1
+
+def parser_version() -> str:
+    """Identifies the parse output of this parser and PDF backend"""
+    return f"{PARSER_FORMAT}/{settings.pdf_backend}"
+
+# A PDF as bytes, or the path of a PDF file such as a spooled upload
+PdfSource = Union[bytes, str]
+
+def _pdf_stream(source: PdfSource):
+    """What pdfplumber.open takes: a path, or a stream over the bytes"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+# pdfium is not thread-safe, and inline parsing runs on several threads
+_pdfium_lock = threading.Lock()
+
+class PdfplumberBackend:
+    """Page text with pdfplumber's full character layout"""
+    name = "pdfplumber"
+    
+    def __init__(self, source: PdfSource):
+        self.pdf = pdfplumber.open(_pdf_stream(source))
+    
+    def page_count(self) -> int:
+        return len(self.pdf.pages)
+    
+    def page_text(self, index: int) -> str:
+        return self.pdf.pages[index].extract_text() or ""
+    
+    def close(self):
+        self.pdf.close()
+
+class PdfiumBackend:
+    """Page text straight from the text layer, without layout analysis"""
+    name = "pdfium"
+    
+    def __init__(self, source: PdfSource):
+        with _pdfium_lock:
+            # Files are read on demand rather than loaded whole
+            self.pdf = pypdfium2.PdfDocument(source)
+    
+    def page_count(self) -> int:
+        with _pdfium_lock:
+            return len(self.pdf)
+    
+    def page_text(self, index: int) -> str:
+        with _pdfium_lock:
+            page = self.pdf[index]
+            text_page = page.get_textpage()
+            try:
+                text = text_page.get_text_range()
+            finally:
+                text_page.close()
+                page.close()
+        # pdfium ends lines with CRLF and marks hyphenated line breaks with U+FFFE
+        return text.replace("\r\n", "\n").replace("\r", "\n").replace("\ufffe", "-\n").strip()
+    
+    def close(self):
+        with _pdfium_lock:
+            self.pdf.close()
+
+PDF_BACKENDS = {
+    "pdfium": PdfiumBackend,
+    "pdfplumber": PdfplumberBackend,
+}
+
+# Fast-path text is rejected when words run together (missing spaces) or come
+# apart into single letters (letter-spaced text), or when it is mostly junk
+MAX_MEAN_WORD_LENGTH = 20
+MAX_SINGLE_LETTER_SHARE = 0.5
+MAX_JUNK_SHARE = 0.1
+_junk_chars = re.compile(r'[\x00-\x08\x0b-\x1f\ufffd]')
+
+def text_looks_usable(text: str) -> bool:
+    """Quality heuristic for text from a fast backend"""
+    words = text.split()
+    if not words:
+        return False
+    if len(_junk_chars.findall(text)) > MAX_JUNK_SHARE * len(text):
+        return False
+    # Scripts written without spaces have no word breaks to lose
+    latin = [word for word in words if word.isascii()]
+    if len(latin) >= 10:
+        if sum(map(len, latin)) / len(latin) > MAX_MEAN_WORD_LENGTH:
+            return False
+        if sum(1 for word in latin if len(word) == 1 and word.isalpha()) > MAX_SINGLE_LETTER_SHARE * len(latin):
+            return False
+    return True
+
+class PdfText:
+    """Page texts of one PDF from the configured backend.
+    
+    With the "auto" backend every page is read with pdfium first and re-read
+    with pdfplumber only when its text fails ``text_looks_usable``; pdfplumber
+    is opened on the first such page, so clean documents never pay for it.
+    """
+    
+    def __init__(self, source: PdfSource, backend: Optional[str] = None):
+        backend = backend or settings.pdf_backend
+        if backend not in ("auto", *PDF_BACKENDS):
+            raise ValueError(f"Unknown PDF backend {backend!r}")
+        if backend in ("auto", "pdfium") and pypdfium2 is None:
+            backend = "pdfplumber"
+        self.source = source
+        self.auto = backend == "auto"
+        self.fallback: Optional[PdfplumberBackend] = None
+        self.counts: Dict[str, int] = {}
+        try:
+            self.primary = PDF_BACKENDS["pdfium" if self.auto else backend](source)
+        except PdfiumError as e:
+            if not self.auto:
+                raise
+            logger.info(f"pdfium could not open the PDF ({e}), using pdfplumber")
+            self.auto = False
+            self.primary = PdfplumberBackend(source)
+    
+    def page_count(self) -> int:
+        return self.primary.page_count()
+    
+    def page_text(self, index: int) -> str:
+        text = self.primary.page_text(index)
+        name = self.primary.name
+        if self.auto and not text_looks_usable(text):
+            if self.fallback is None:
+                self.fallback = PdfplumberBackend(self.source)
+            text = self.fallback.page_text(index)
+            name = self.fallback.name
+            logger.debug(f"Page {index + 1}: fast text rejected, re-extracted with {name}")
+        self.counts[name] = self.counts.get(name, 0) + 1
+        return text
+    
+    def close(self):
+        self.primary.close()
+        if self.fallback is not None:
+            self.fallback.close()
+    
+    def __enter__(self) -> "PdfText":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Field patterns run on the lowercased text
+SKILL_TEXT_REGEX = re.compile(r'[^\w\s.#+/-]')
+EXPERIENCE_REGEXES = [
+    re.compile(r'(\d+)\+?\s*(?:years?|yrs?)[\s\w]*(?:of\s+)?experience'),
+    re.compile(r'experience[:\s]+(\d+)\+?\s*(?:years?|yrs?)'),
+    re.compile(r'(\d+)\+?\s*(?:years?|yrs?)\s+experience')
+]
+# Highest level first
+EDUCATION_REGEXES = [
+    ('phd', re.compile(r'\b(phd|ph\.d|doctorate|doctoral)\b')),
+    ('master', re.compile(r'\b(master|masters|mba|m\.s|m\.tech|m\.e|m\.sc)\b')),
+    ('bachelor', re.compile(r'\b(bachelor|bachelors|b\.s|b\.tech|b\.e|b\.sc|undergraduate)\b'))
+]
+
 class ResumeParser:
     SKILLS = [
         'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'go', 'rust', 'ruby', 'php', 'swift', 'kotlin', 'scala',
@@ -21,43 +229,84 @@ class ResumeParser:
         'communication', 'leadership', 'teamwork', 'problem solving', 'analytical', 'critical thinking'
     ]
     
-    def parse_pdf(self, file_content: bytes) -> str:
-        """Extract text using pdfplumber"""
-        text_parts = []
-        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(page_text)
-        
-        full_text = "\n".join(text_parts)
-        return full_text.strip()
+    def __init__(self):
+        # Every skill is matched in one pass; see extract_skills
+        self.skill_automaton = get_automaton(self.SKILLS)
+    
+    def iter_pdf_pages(self, source: PdfSource, first: int = 0, last: Optional[int] = None,
+                       deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """Text of pages first..last (all remaining when last is None), one page at a time"""
+        start = time.perf_counter()
+        with PdfText(source) as pdf:
+            try:
+                for index in range(*slice(first, last).indices(pdf.page_count())):
+                    check(deadline, f"page {index + 1}")
+                    yield pdf.page_text(index)
+            finally:
+                backends = ", ".join(f"{count} {name}" for name, count in pdf.counts.items()) or "no pages"
+                logger.info(f"PDF text extracted in {time.perf_counter() - start:.3f}s ({backends})")
+    
+    def iter_pdf_text(self, source: PdfSource, deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """Text of parse_pdf in chunks, each yielded as soon as its page is decoded"""
+        return join_pages(self.iter_pdf_pages(source, deadline=deadline))
+    
+    def count_pdf_pages(self, source: PdfSource) -> int:
+        """Page count from the page tree without decoding any page, 0 if the tree is unreadable"""
+        if pypdfium2 is not None and settings.pdf_backend != "pdfplumber":
+            try:
+                pdf = PdfiumBackend(source)
+            except PdfiumError:
+                return 0
+            try:
+                return pdf.page_count()
+            finally:
+                pdf.close()
+        with pdfplumber.open(_pdf_stream(source)) as pdf:
+            try:
+                return int(resolve1(resolve1(pdf.doc.catalog['Pages'])['Count']))
+            except (KeyError, TypeError, ValueError):
+                return 0
+    
+    def extract_pdf_pages(self, source: PdfSource, first: int, last: Optional[int],
+                          deadline: Optional[Deadline] = None) -> List[str]:
+        """Text of a page range, for parallel extraction"""
+        start = time.perf_counter()
+        pages = list(self.iter_pdf_pages(source, first, last, deadline))
+        logger.debug(f"Pages {first + 1}-{first + len(pages)} extracted in {time.perf_counter() - start:.2f}s")
+        return pages
+    
+    def parse_pdf(self, source: PdfSource, deadline: Optional[Deadline] = None) -> str:
+        """Extract text with the configured PDF backend"""
+        return "".join(self.iter_pdf_text(source, deadline))
     
     def extract_skills(self, text: str) -> List[str]:
         """Extract skills from text"""
-        text_lower = text.lower()
+        return self._skills(text.lower())
+    
+    def _skills(self, text_lower: str) -> List[str]:
+        """Skills in lowercased text: the ones a separate re.search(r'\\b' + skill + r'\\b')
+        per skill finds, in one automaton pass. The automaton folds case like re.IGNORECASE,
+        so its matches are checked against the lowercased text, which is what
+        the skills were always compared with."""
         # amazonq-ignore-next-line
-        text_lower = re.sub(r'[^\w\s.#+/-]', ' ', text_lower)
-        
-        found_skills = []
-        for skill in self.SKILLS:
-            skill_normalized = skill.replace('.', r'\.').replace('+', r'\+')
-            if re.search(r'\b' + skill_normalized + r'\b', text_lower):
-                found_skills.append(skill)
+        text_lower = SKILL_TEXT_REGEX.sub(' ', text_lower)
         
-        return found_skills
+        automaton = self.skill_automaton
+        found = {
+            idx for start, end, idx in automaton.bounded_matches(text_lower)
+            if text_lower[start:end] == automaton.patterns[idx]
+        }
+        return [skill for idx, skill in enumerate(self.SKILLS) if idx in found]
     
     def extract_experience_years(self, text: str) -> float:
         """Extract years of experience"""
-        patterns = [
-            r'(\d+)\+?\s*(?:years?|yrs?)[\s\w]*(?:of\s+)?experience',
-            r'experience[:\s]+(\d+)\+?\s*(?:years?|yrs?)',
-            r'(\d+)\+?\s*(?:years?|yrs?)\s+experience'
-        ]
-        
+        return self._experience_years(text.lower())
+    
+    @staticmethod
+    def _experience_years(text_lower: str) -> float:
         max_years = 0.0
-        for pattern in patterns:
-            matches = re.findall(pattern, text.lower())
+        for pattern in EXPERIENCE_REGEXES:
+            matches = pattern.findall(text_lower)
             for match in matches:
                 years = float(match)
                 if 0 < years < 50:
@@ -67,42 +316,50 @@ class ResumeParser:
     
     def extract_education(self, text: str) -> str:
         """Extract highest education level"""
-        text_lower = text.lower()
-        
-        if re.search(r'\b(phd|ph\.d|doctorate|doctoral)\b', text_lower):
-            return 'phd'
-        elif re.search(r'\b(master|masters|mba|m\.s|m\.tech|m\.e|m\.sc)\b', text_lower):
-            return 'master'
-        elif re.search(r'\b(bachelor|bachelors|b\.s|b\.tech|b\.e|b\.sc|undergraduate)\b', text_lower):
-            return 'bachelor'
+        return self._education(text.lower())
+    
+    @staticmethod
+    def _education(text_lower: str) -> str:
+        for level, pattern in EDUCATION_REGEXES:
+            if pattern.search(text_lower):
+                return level
         
         return 'none'
     
-    def parse_resume(self, file_content: bytes) -> Dict:
+    def extract_fields(self, text: str) -> Dict:
+        """Skills, experience and education from a single lowercased copy of the text"""
+        text_lower = text.lower()
+        return {
+            'skills': self._skills(text_lower),
+            'experience_years': self._experience_years(text_lower),
+            'education': self._education(text_lower)
+        }
+    
+    def parse_resume(self, source: PdfSource, deadline: Optional[Deadline] = None) -> Dict:
         """Parse resume and extract all information"""
-        text = self.parse_pdf(file_content)
-        
+        return self.parse_text(self.parse_pdf(source, deadline), deadline)
+    
+    def parse_text(self, text: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Extract all information from a resume's text"""
         if not text.strip():
             # amazonq-ignore-next-line
             raise ValueError("Could not extract text from PDF")
         
-        return {
-            'text': text,
-            'skills': self.extract_skills(text),
-            'experience_years': self.extract_experience_years(text),
-            'education': self.extract_education(text)
-        }
+        check(deadline, "field extraction")
+        return {'text': text, **self.extract_fields(text)}
 
 class JobParser:
     def __init__(self):
         self.resume_parser = ResumeParser()
     
-    def parse_job_description(self, description: str) -> Dict:
+    def parse_job_description(self, description: str, deadline: Optional[Deadline] = None) -> Dict:
         """Parse job description"""
+        check(deadline, "job parsing")
+        fields = self.resume_parser.extract_fields(description)
         return {
-            'required_skills': self.resume_parser.extract_skills(description),
-            'experience_required': self.resume_parser.extract_experience_years(description),
-            'education_required': self.resume_parser.extract_education(description)
+            'required_skills': fields['skills'],
+            'experience_required': fields['experience_years'],
+            'education_required': fields['education']
         }
 
 _resume_parser = None
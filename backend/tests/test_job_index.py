@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from job_index import JobIndex, JobIndexRegistry
+from jobalytics_matcher import get_matcher
+
+WORDS = [
+    "python", "java", "docker", "kubernetes", "sql", "aws", "react", "engineer", "developer",
+    "product", "marketing", "seo", "roadmap", "stakeholder", "analytics", "excel", "leadership",
+    "communication", "agile", "campaign", "brand", "budget", "sales", "customer", "c++",
+]
+
+
+def random_text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))) + f" zq{rng.randint(0, 9)}x"
+
+
+def random_jobs(rng: random.Random, count: int, first_id: int = 1):
+    matcher = get_matcher()
+    return [
+        {'id': job_id, 'keyword_profile': matcher.build_job_profile(random_text(rng))}
+        for job_id in range(first_id, first_id + count)
+    ]
+
+
+def brute_force_top_k(jobs, resume_profile, k):
+    """Every job scored with match_profiles, best first, ties to the newest job"""
+    matcher = get_matcher()
+    scored = [(matcher.match_profiles(resume_profile, job['keyword_profile'])['score'], job['id']) for job in jobs]
+    return [(job_id, score) for score, job_id in sorted(scored, reverse=True)[:k]]
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 500])
+def test_top_k_matches_brute_force(k):
+    rng = random.Random(k)
+    matcher = get_matcher()
+    jobs = random_jobs(rng, 300)
+    index = JobIndex(matcher, jobs, (len(jobs), sum(job['id'] for job in jobs)))
+    for _ in range(40):
+        resume_profile = matcher.build_profile(random_text(rng))
+        assert index.top_k(resume_profile, k) == brute_force_top_k(jobs, resume_profile, k)
+
+
+def test_incremental_changes_match_a_rebuilt_index():
+    rng = random.Random(8)
+    matcher = get_matcher()
+    jobs = random_jobs(rng, 100)
+    index = JobIndex(matcher, jobs, (len(jobs), sum(job['id'] for job in jobs)))
+    added = random_jobs(rng, 20, first_id=101)
+    for job in added:
+        index.add_job(job)
+    removed = set(rng.sample(range(1, 121), 40))
+    for job_id in removed:
+        index.remove_job(job_id)
+
+    remaining = [job for job in jobs + added if job['id'] not in removed]
+    assert index.fingerprint == (len(remaining), sum(job['id'] for job in remaining))
+    for _ in range(30):
+        resume_profile = matcher.build_profile(random_text(rng))
+        assert index.top_k(resume_profile, 10) == brute_force_top_k(remaining, resume_profile, 10)
+
+
+def test_registry_invalidates_on_fingerprint_or_version_change():
+    rng = random.Random(9)
+    matcher = get_matcher()
+    jobs = random_jobs(rng, 5)
+    fingerprint = (5, 15)
+    registry = JobIndexRegistry(max_users=2)
+    registry.put(1, JobIndex(matcher, jobs, fingerprint))
+
+    assert registry.get(1, fingerprint, matcher.version) is not None
+    assert registry.get(1, fingerprint, "other-version") is None
+    # Dropped on mismatch: the next read rebuilds it
+    assert registry.get(1, fingerprint, matcher.version) is None
+
+    registry.put(1, JobIndex(matcher, jobs, fingerprint))
+    assert registry.get(1, (5, 16), matcher.version) is None
+
+    # Changes made through the registry keep the fingerprint in step with the database
+    registry.put(1, JobIndex(matcher, jobs, fingerprint))
+    registry.add_job(1, random_jobs(rng, 1, first_id=6)[0])
+    registry.remove_job(1, 2)
+    assert registry.get(1, (5, 19), matcher.version) is not None
+
+
+def test_registry_evicts_least_recently_used_user():
+    matcher = get_matcher()
+    registry = JobIndexRegistry(max_users=2)
+    for user_id in (1, 2):
+        registry.put(user_id, JobIndex(matcher, [], (0, 0)))
+    registry.get(1, (0, 0), matcher.version)
+    registry.put(3, JobIndex(matcher, [], (0, 0)))
+    assert registry.get(2, (0, 0), matcher.version) is None
+    assert registry.get(1, (0, 0), matcher.version) is not None
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+import job_ingestion
+from job_ingestion import ingest_job_feed, normalize_job
+from worker_pool import WorkerPool
+
+JOB = {"title": "Backend Engineer", "company": "Acme", "description": "Python and PostgreSQL services"}
+
+
+@pytest.mark.parametrize("title", ["", "   ", "\x00", None])
+def test_normalize_job_rejects_empty_title(title):
+    with pytest.raises(ValueError, match="Missing title"):
+        normalize_job({**JOB, "title": title})
+
+
+def test_empty_title_fails_only_its_record(monkeypatch):
+    inserted = []
+
+    def insert_jobs(user_id, jobs, source=None, records_done=0):
+        inserted.extend(jobs)
+        return list(range(len(jobs)))
+
+    monkeypatch.setattr(job_ingestion.JobDB, "insert_jobs", staticmethod(insert_jobs))
+
+    async def records():
+        yield 1, JOB, None
+        yield 2, {**JOB, "title": ""}, None
+        yield 3, {**JOB, "company": "Globex"}, None
+
+    async def ingest():
+        pool = WorkerPool(size=0, queue_depth=1, inline_size=0)
+        return [progress async for progress in ingest_job_feed(records(), 1, pool)]
+
+    progress = asyncio.run(ingest())
+    assert progress[-1] == {"status": "finished", "records_done": 3, "inserted": 2, "failed": 1}
+    assert [job["record"] for job in inserted] == [1, 3]
+    assert all(job["title"] for job in inserted)
@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+# Synonyms and words sharing a prefix rule, where "first seen" picks the representative
+TEXT = ("Led strategy and strategic planning as strategist for marketing campaigns; analytics, "
+        "analysis and analyst work, python developer developing apis, managed management of teams")
+
+PROFILE_SCRIPT = f"""
+import json
+from jobalytics_matcher import get_matcher
+profile = get_matcher().build_profile({TEXT!r})
+print(json.dumps({{'bits': profile['bits'], 'extra': profile['extra']}}, sort_keys=True))
+"""
+
+
+def build_profile_with_hash_seed(seed: int) -> dict:
+    env = dict(os.environ, PYTHONHASHSEED=str(seed), LOG_LEVEL="WARNING")
+    out = subprocess.run([sys.executable, "-c", PROFILE_SCRIPT], cwd=BACKEND_DIR, env=env,
+                         check=True, capture_output=True, text=True)
+    return json.loads(out.stdout)
+
+
+def test_profile_bits_do_not_depend_on_hash_seed():
+    profiles = [build_profile_with_hash_seed(seed) for seed in (1, 2)]
+    assert profiles[0] == profiles[1]
+    assert any(profiles[0]['bits'].values())
@@ -0,0 +1,96 @@
+import random
+import re
+from typing import List, Set
+
+import pytest
+
+import jobalytics_keywords
+from jobalytics_matcher import KEYWORD_FORMS, SUFFIXES, automaton_words, get_matcher
+from keyword_engine import get_automaton
+
+# Characters re.IGNORECASE folds onto ASCII letters (Kelvin sign, long s, dotted
+# capital I), separators that decide \b boundaries, and special-word endings
+TRICKY = ["K", "ſ", "İ", "ı", "-", "+", "#", ".", "/", "_", "\n", "  ", "é"]
+
+
+def regex_keywords(text: str, words: List[str]) -> Set[str]:
+    """Keyword extraction as the matcher did it with one regex per form"""
+    keywords = set()
+    for suffix in [""] + SUFFIXES:
+        forms = [w + suffix for w in words]
+        special = [re.escape(w) for w in forms if re.search(r'\b[a-z]\W+\B', w, re.IGNORECASE)]
+        normal = [re.escape(w) for w in forms if not re.search(r'\b[a-z]\W+\B', w, re.IGNORECASE)]
+        regex = re.compile(r'\b(?:' + '|'.join(special) + r')\B|\b(?:' + '|'.join(normal) + r')\b', re.IGNORECASE)
+        for match in regex.findall(text):
+            keyword = match.lower().replace('-', ' ')
+            keywords.add(keyword[:-len(suffix)] if suffix else keyword)
+    return keywords
+
+
+def random_text(rng: random.Random, words: List[str], length: int) -> str:
+    """Vocabulary words in random forms and cases, mixed with filler and tricky characters"""
+    parts = []
+    for _ in range(length):
+        roll = rng.random()
+        if roll < 0.5:
+            word = rng.choice(words) + rng.choice(KEYWORD_FORMS)
+            parts.append(rng.choice([word, word.upper(), word.title()]))
+        elif roll < 0.8:
+            parts.append(rng.choice(["the", "and", "team", "years", "of", "with", "a", "x"]))
+        else:
+            parts.append(rng.choice(TRICKY))
+    return "".join(part + rng.choice([" ", " ", "", ", "]) for part in parts)
+
+
+@pytest.mark.parametrize("source", ["swe_essentials", "swe_nice_to_haves", "pm_marketing_keywords"])
+def test_automaton_matches_regex_extraction(source):
+    words = automaton_words(getattr(jobalytics_keywords, source))
+    automaton = get_automaton(words, KEYWORD_FORMS)
+    rng = random.Random(source)
+    for _ in range(40):
+        text = random_text(rng, words, rng.choice([5, 50, 400]))
+        assert automaton.extract(text) == regex_keywords(text, words), text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Skilled in C++ and C#.", {"c++", "c#"}),
+    ("C++11 and C#/.NET", {"c#"}),
+    ("Kubernetes and PYTHON", {"kubernetes", "python"}),
+    ("pythonic javascripts", {"javascript"}),
+    ("go-to-market testing", {"go to market", "test"}),
+])
+def test_automaton_boundaries_and_case_folding(text, expected):
+    words = automaton_words(["c++", "c#", "kubernetes", "python", "javascript", "go-to-market", "test", "go"])
+    automaton = get_automaton(words, KEYWORD_FORMS)
+    assert automaton.extract(text) == regex_keywords(text, words)
+    assert expected <= automaton.extract(text)
+
+
+def random_chunks(rng: random.Random, text: str) -> List[str]:
+    """text cut at random places, empty chunks included"""
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.choice([1, 3, 20, 200]))))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])] + [""]
+
+
+def test_streaming_scan_matches_whole_text_scan():
+    automaton = get_matcher().vocabulary.automaton
+    words = automaton_words(jobalytics_keywords.swe_essentials + jobalytics_keywords.pm_marketing_keywords)
+    rng = random.Random(16)
+    for _ in range(60):
+        text = random_text(rng, words + ["engineer", "product", "marketing"], rng.choice([5, 50, 400]))
+        scan = automaton.scanner()
+        markers = set()
+        for chunk in random_chunks(rng, text):
+            markers |= scan.feed(chunk)
+        keywords, last = scan.close()
+        assert (keywords, markers | last) == automaton.scan(text), text
+        assert keywords["swe_essentials"] == regex_keywords(text, automaton.lists["swe_essentials"]), text
+
+
+def test_profile_from_chunks_matches_profile_of_joined_text():
+    matcher = get_matcher()
+    words = automaton_words(jobalytics_keywords.swe_essentials + jobalytics_keywords.general_keywords)
+    rng = random.Random(17)
+    for _ in range(30):
+        text = random_text(rng, words, rng.choice([5, 50, 400]))
+        assert matcher.build_profile_from_chunks(iter(random_chunks(rng, text))) == matcher.build_profile(text), text
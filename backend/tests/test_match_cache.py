@@ -0,0 +1,67 @@
+import match_cache
+from match_cache import MatchCache, _entry_size
+
+
+def result(*keywords: str) -> dict:
+    return {'score': 0.5, 'matches': list(keywords), 'unmatches': []}
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(match_cache.time, "monotonic", lambda: now[0])
+    cache = MatchCache(max_entries=10, max_bytes=10 ** 6, ttl_seconds=60)
+    cache.put("a", result("python"))
+
+    now[0] += 60
+    assert cache.get("a") == result("python")
+    now[0] += 1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["size_bytes"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = MatchCache(max_entries=2, max_bytes=10 ** 6, ttl_seconds=60)
+    cache.put("a", result())
+    cache.put("b", result())
+    cache.get("a")
+    cache.put("c", result())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_bounds_the_cache():
+    entry = result("kubernetes", "python")
+    cache = MatchCache(max_entries=100, max_bytes=3 * _entry_size(entry), ttl_seconds=60)
+    for key in "abcde":
+        cache.put(key, entry)
+
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["size_bytes"] == 3 * _entry_size(entry)
+    assert [key for key in "abcde" if cache.get(key)] == ["c", "d", "e"]
+
+
+def test_replacing_an_entry_keeps_the_size_accounting():
+    cache = MatchCache(max_entries=10, max_bytes=10 ** 6, ttl_seconds=60)
+    cache.put("a", result("python"))
+    cache.put("a", result("kubernetes", "docker"))
+
+    assert cache.stats()["size_bytes"] == _entry_size(result("kubernetes", "docker"))
+    cache.clear()
+    assert cache.stats()["size_bytes"] == 0
+
+
+def test_hits_and_misses_are_counted():
+    cache = MatchCache(max_entries=10, max_bytes=10 ** 6, ttl_seconds=60)
+    cache.put("a", result())
+    cache.get("a")
+    cache.get("b")
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_keys_include_the_vocabulary_version():
+    assert MatchCache.key("v1", "r", "j") != MatchCache.key("v2", "r", "j")
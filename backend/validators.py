@@ -1,33 +1,199 @@
-from fastapi import UploadFile, HTTPException
+import hashlib
+import tempfile
+import zipfile
+from functools import partial
+from typing import IO, BinaryIO, Callable, List, Optional, Tuple
+from fastapi import UploadFile, HTTPException, Request
 from config import settings
 from logger import logger
 
-async def validate_pdf_upload(file: UploadFile) -> bytes:
-    """Validate PDF file upload with security checks"""
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+MALICIOUS_MARKERS = (b'<script', b'javascript:')
+# A marker split across two chunks starts within this many bytes of the earlier chunk's end
+_MARKER_OVERLAP = max(len(marker) for marker in MALICIOUS_MARKERS) - 1
+
+ZIP_MAGIC = b'PK\x03\x04'
+
+class SpooledUpload:
+    """An upload spooled to a temporary file; parsing workers open it by path
+    instead of receiving a pickled copy of its bytes. The content is hashed as
+    it is written."""
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.file = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", dir=settings.upload_spool_dir)
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+    
+    @property
+    def path(self) -> str:
+        return self.file.name
+    
+    @property
+    def content_hash(self) -> str:
+        return self.sha256.hexdigest()
+    
+    def write(self, chunk: bytes):
+        self.file.write(chunk)
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+    
+    def read(self) -> bytes:
+        """The whole upload, for when it has to leave this host (e.g. queued in the database)"""
+        self.file.seek(0)
+        return self.file.read()
+    
+    def close(self):
+        self.file.close()
     
+    def __enter__(self) -> "SpooledUpload":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size: {settings.max_file_size_mb}MB"
+    )
+
+def _check_pdf_name_and_size(filename: str, size: Optional[int]):
     # Check file extension
-    if not file.filename.lower().endswith('.pdf'):
+    if not filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Read file content
-    content = await file.read()
-    
+    # The multipart parser or the archive may already know the size
+    if size is not None and size > settings.max_file_size_bytes:
+        raise _too_large()
+
+def _spool_chunk(upload: SpooledUpload, chunk: bytes, tail: bytes) -> bytes:
+    """Check one chunk and append it to the upload; returns the tail the next chunk's seam check needs"""
     # Check file size
-    if len(content) > settings.max_file_size_bytes:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size: {settings.max_file_size_mb}MB"
-        )
+    if upload.size + len(chunk) > settings.max_file_size_bytes:
+        raise _too_large()
     
     # Check PDF magic bytes
-    if not content.startswith(b'%PDF'):
+    if upload.size == 0 and not chunk.startswith(b'%PDF'):
         raise HTTPException(status_code=400, detail="Invalid PDF file")
     
-    # Check for malicious content (basic check)
-    if b'<script' in content.lower() or b'javascript:' in content.lower():
+    # Check for malicious content (basic check); lowering a chunk is
+    # much faster than a case-insensitive regex over it
+    lowered = chunk.lower()
+    seam = tail + lowered[:_MARKER_OVERLAP]
+    if any(marker in lowered or marker in seam for marker in MALICIOUS_MARKERS):
         raise HTTPException(status_code=400, detail="Potentially malicious content detected")
     
-    return content
+    upload.write(chunk)
+    return (tail + lowered[-_MARKER_OVERLAP:])[-_MARKER_OVERLAP:]
+
+def _finish_spool(upload: SpooledUpload):
+    if upload.size == 0:
+        raise HTTPException(status_code=400, detail="Invalid PDF file")
+    upload.file.flush()
+    logger.debug(f"Upload {upload.filename} spooled: {upload.size} bytes")
+
+async def validate_pdf_upload(file: UploadFile) -> SpooledUpload:
+    """Validate PDF file upload with security checks.
+    
+    The upload is read in chunks: it is rejected as soon as it exceeds the size
+    limit, the magic bytes are checked on the first chunk, and the malicious
+    content scan looks at each chunk once, plus the seams between chunks.
+    The caller closes the returned upload, which deletes its file.
+    """
+    _check_pdf_name_and_size(file.filename, file.size)
+    
+    upload = SpooledUpload(file.filename)
+    try:
+        tail = b''
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            tail = _spool_chunk(upload, chunk, tail)
+        _finish_spool(upload)
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
+def spool_pdf_stream(filename: str, stream: BinaryIO, size: Optional[int] = None) -> SpooledUpload:
+    """Validate a PDF read from a blocking stream, such as an archive entry, as validate_pdf_upload does"""
+    _check_pdf_name_and_size(filename, size)
+    
+    upload = SpooledUpload(filename)
+    try:
+        tail = b''
+        while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+            tail = _spool_chunk(upload, chunk, tail)
+        _finish_spool(upload)
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
+def _spool_archive_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> SpooledUpload:
+    with archive.open(info) as stream:
+        # The declared size is checked first; the size limit still applies to what actually decompresses
+        return spool_pdf_stream(info.filename, stream, info.file_size)
+
+def is_archive_upload(file: UploadFile) -> bool:
+    return file.filename.lower().endswith('.zip')
+
+def open_pdf_archive(file: UploadFile) -> List[Tuple[str, Callable[[], SpooledUpload]]]:
+    """Open an uploaded zip in place and list its files.
+    
+    Only the archive's directory is read here. Each entry comes with a
+    function that validates and spools it, so entries are decompressed one
+    at a time as they are imported instead of all at once.
+    """
+    if file.size is not None and file.size > settings.max_archive_size_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Archive too large. Maximum size: {settings.max_archive_size_mb}MB"
+        )
+    
+    file.file.seek(0)
+    if file.file.read(len(ZIP_MAGIC)) != ZIP_MAGIC:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+    file.file.seek(0)
+    try:
+        archive = zipfile.ZipFile(file.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+    
+    entries = []
+    for info in archive.infolist():
+        name = info.filename.rsplit('/', 1)[-1]
+        # Skip folders and the metadata files archivers add
+        if info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+            continue
+        entries.append((info.filename, partial(_spool_archive_entry, archive, info)))
+    return entries
+
+async def spool_job_feed(request: Request) -> IO[bytes]:
+    """Spool a job feed request body to a temporary file, enforcing the feed size limit.
+    
+    The body is read completely before ingestion starts, as the streamed
+    progress response cannot share the connection's receive channel with it.
+    The caller closes the returned file, which deletes it.
+    """
+    feed = tempfile.NamedTemporaryFile(prefix="jobfeed-", suffix=".feed", dir=settings.upload_spool_dir)
+    try:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.max_job_feed_size_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Feed too large. Maximum size: {settings.max_job_feed_size_mb}MB"
+                )
+            feed.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty feed")
+        feed.seek(0)
+    except BaseException:
+        feed.close()
+        raise
+    return feed
 
 def sanitize_string(text: str, max_length: int = 10000) -> str:
     """Sanitize string input"""
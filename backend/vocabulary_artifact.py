@@ -0,0 +1,176 @@
+"""Compiled vocabulary artifacts.
+
+Usage: python vocabulary_artifact.py
+
+Compiles the keyword vocabularies into one binary file per vocabulary
+version: the keyword lists, the combined keyword automaton's transition
+tables and its morphology map. The integer tables are memory-mapped on load, so the API
+workers and pool processes of a host share one physical copy instead of each
+building its own. Files are named by version, so a process can load exactly
+the vocabulary a task was started with, including after a hot reload.
+"""
+import glob
+import json
+import mmap
+import os
+import sys
+from array import array
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from keyword_engine import KeywordAutomaton
+from config import settings
+from logger import logger
+
+if TYPE_CHECKING:
+    from jobalytics_matcher import Vocabulary
+
+ARTIFACT_MAGIC = b"RSVOCAB\n"
+# Bump when the file layout or the automaton tables change meaning
+ARTIFACT_FORMAT = 3
+
+# Artifacts of older versions kept next to the newest ones
+RETAINED_ARTIFACTS = 3
+
+_ALIGNMENT = 8
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def artifact_path(version: str) -> str:
+    return os.path.join(settings.vocabulary_artifact_dir, f"vocabulary-{version}.bin")
+
+
+def write_artifact(vocabulary: "Vocabulary") -> str:
+    """Write a vocabulary's artifact atomically: readers never see a partial file"""
+    sections: List[bytes] = []
+    offset = 0
+    automaton = vocabulary.automaton
+    tables = {}
+    for name in KeywordAutomaton.TABLES:
+        table = automaton.tables[name]
+        if not isinstance(table, array):
+            table = array(table.format, table)
+        data = table.tobytes()
+        tables[name] = [offset, table.typecode, len(table)]
+        padding = _aligned(len(data)) - len(data)
+        sections.append(data + b"\0" * padding)
+        offset += len(data) + padding
+
+    header = json.dumps({
+        "format": ARTIFACT_FORMAT,
+        "version": vocabulary.version,
+        "byteorder": sys.byteorder,
+        "lists": vocabulary.lists,
+        "synonyms": vocabulary.synonyms,
+        "automaton": {
+            "lists": automaton.lists,
+            "suffixes": automaton.suffixes,
+            "markers": automaton.markers,
+            "morphology": automaton.morphology,
+            "tables": tables,
+        },
+    }).encode("utf-8")
+    prefix = ARTIFACT_MAGIC + len(header).to_bytes(4, "little") + header
+    prefix += b"\0" * (_aligned(len(prefix)) - len(prefix))
+
+    path = artifact_path(vocabulary.version)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        for data in sections:
+            f.write(data)
+    os.replace(tmp_path, path)
+    _prune(path)
+    return path
+
+
+def _prune(keep: str):
+    """Drop all but the newest few artifacts; mapped files stay readable until unmapped"""
+    paths = sorted(glob.glob(artifact_path("*")), key=os.path.getmtime, reverse=True)
+    for path in paths[RETAINED_ARTIFACTS:]:
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class VocabularyArtifact:
+    """A loaded artifact; the automaton's tables are memoryviews over a read-only mmap"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[:len(ARTIFACT_MAGIC)] != ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a vocabulary artifact")
+        header_start = len(ARTIFACT_MAGIC) + 4
+        header_length = int.from_bytes(self.mmap[len(ARTIFACT_MAGIC):header_start], "little")
+        header = json.loads(self.mmap[header_start:header_start + header_length].decode("utf-8"))
+        data_start = _aligned(header_start + header_length)
+
+        self.path = path
+        self.format: int = header["format"]
+        self.version: str = header["version"]
+        self.byteorder: str = header["byteorder"]
+        self.lists: Dict[str, List[str]] = header["lists"]
+        self.synonyms: List[List[str]] = header["synonyms"]
+        self.automaton: Optional[KeywordAutomaton] = None
+        if not self.is_compatible():
+            return
+
+        view = memoryview(self.mmap)
+        entry = header["automaton"]
+        tables: Dict[str, memoryview] = {}
+        for name, (offset, typecode, count) in entry["tables"].items():
+            start = data_start + offset
+            width = array(typecode).itemsize
+            tables[name] = view[start:start + count * width].cast(typecode)
+        self.automaton = KeywordAutomaton(
+            entry["lists"], entry["suffixes"], entry["markers"], tables=tables, morphology=entry["morphology"]
+        )
+
+    def is_compatible(self) -> bool:
+        return self.format == ARTIFACT_FORMAT and self.byteorder == sys.byteorder
+
+
+def load_artifact(version: str) -> Optional[VocabularyArtifact]:
+    """Load the artifact of a vocabulary version if it was built, else None"""
+    path = artifact_path(version)
+    if not os.path.exists(path):
+        logger.info(f"No vocabulary artifact at {path}, compiling vocabularies in-process")
+        return None
+    try:
+        artifact = VocabularyArtifact(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Unreadable vocabulary artifact {path}: {e}")
+        return None
+    if not artifact.is_compatible() or artifact.version != version:
+        logger.warning(
+            f"Vocabulary artifact {path} is incompatible (format {artifact.format}, "
+            f"version {artifact.version}), recompiling"
+        )
+        return None
+    return artifact
+
+
+def build() -> VocabularyArtifact:
+    """Compile the vocabulary defined by jobalytics_keywords and write its artifact"""
+    from jobalytics_matcher import Vocabulary
+
+    vocabulary = Vocabulary.from_source()
+    if not os.path.exists(artifact_path(vocabulary.version)):
+        raise OSError(f"Could not write {artifact_path(vocabulary.version)}")
+    return load_artifact(vocabulary.version)
+
+
+def main() -> int:
+    artifact = build()
+    print(f"Wrote {artifact.path}: version {artifact.version}, {len(artifact.automaton.patterns)} patterns, "
+          f"{os.path.getsize(artifact.path) // 1024} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+import asyncio
+import copy
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from logger import logger
+from parser import get_resume_parser, join_pages, PdfSource
+from jobalytics_matcher import get_matcher
+from document_analyzer import get_analyzer
+from deadline import Deadline, DeadlineExceeded, set_cancel_flags
+
+
+class WorkerPoolBusy(Exception):
+    """Raised when the pool's queue is full"""
+
+
+def _init_worker(cancel_flags):
+    """Load vocabularies, automata and the parser once per worker process"""
+    set_cancel_flags(cancel_flags)
+    get_matcher()
+    get_resume_parser()
+
+
+def _warm_up():
+    pass
+
+
+# Tasks run inside worker processes; module-level so they can be pickled by name
+
+# PDFs are passed as the path of a spooled upload where possible, so workers
+# read the file instead of unpickling a copy of it
+
+def count_pdf_pages(source: PdfSource, deadline: Optional[Deadline] = None) -> int:
+    return get_resume_parser().count_pdf_pages(source)
+
+def extract_pdf_pages(source: PdfSource, first: int, last: Optional[int], deadline: Optional[Deadline] = None) -> List[str]:
+    return get_resume_parser().extract_pdf_pages(source, first, last, deadline)
+
+# Matcher tasks name the vocabulary version the caller started with; a worker
+# that has not seen it yet loads it from its artifact
+
+def build_profile(text: str, version: str, deadline: Optional[Deadline] = None) -> Dict:
+    return get_matcher(version).build_profile(text, deadline=deadline)
+
+def build_job_profile(text: str, version: str, deadline: Optional[Deadline] = None) -> Dict:
+    return get_matcher(version).build_job_profile(text, deadline)
+
+def build_profiles(texts: List[str], version: str, deadline: Optional[Deadline] = None) -> List[Dict]:
+    """Profiles of a batch of texts in one task, e.g. stale ones after a vocabulary reload"""
+    matcher = get_matcher(version)
+    return [matcher.build_profile(text, deadline) for text in texts]
+
+def build_job_profiles(texts: List[str], version: str, deadline: Optional[Deadline] = None) -> List[Dict]:
+    matcher = get_matcher(version)
+    return [matcher.build_job_profile(text, deadline) for text in texts]
+
+def analyze_resume_pdf(source: PdfSource, version: str, deadline: Optional[Deadline] = None) -> Dict:
+    """Analyze a resume PDF, extracting keywords page by page as pages are decoded"""
+    return get_analyzer(version).analyze_resume_chunks(get_resume_parser().iter_pdf_text(source, deadline), deadline)
+
+def analyze_resume_text(text: str, version: str, deadline: Optional[Deadline] = None) -> Dict:
+    """Analyze an already extracted resume text"""
+    return get_analyzer(version).analyze_resume(text, deadline)
+
+def analyze_job(text: str, version: str, deadline: Optional[Deadline] = None) -> Dict:
+    return get_analyzer(version).analyze_job(text, deadline)
+
+def analyze_jobs(texts: List[str], version: str, deadline: Optional[Deadline] = None) -> List[Dict]:
+    """Analyze a batch of job descriptions in one task, paying the pickling round trip once"""
+    analyzer = get_analyzer(version)
+    return [analyzer.analyze_job(text, deadline) for text in texts]
+
+def match_profile(resume_profile: Dict, job_text: str, version: str, deadline: Optional[Deadline] = None) -> Dict:
+    return get_matcher(version).match_profile(resume_profile, job_text, deadline)
+
+
+class WorkerPool:
+    """Process pool for CPU-bound parsing and keyword extraction.
+
+    Threads share the GIL, so regex and pdfplumber work only scales across
+    cores in separate processes. Inputs smaller than ``inline_size`` are not
+    worth the pickling round trip and run on a thread instead. At most
+    ``size + queue_depth`` tasks are in flight; beyond that ``run`` raises
+    WorkerPoolBusy so callers can shed load instead of queueing unboundedly.
+
+    Every task gets the request's Deadline. When the deadline passes or the
+    caller is cancelled, the task is abandoned: a queued task is dropped and
+    a running one is flagged through a shared-memory slot so it stops at its
+    next deadline check. Abandoned tasks keep their slot until they actually
+    finish, so work that is still burning CPU counts against the queue.
+    """
+
+    def __init__(self, size: int, queue_depth: int, inline_size: int):
+        self.size = size
+        self.queue_depth = queue_depth
+        self.inline_size = inline_size
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.context = multiprocessing.get_context("spawn")
+        self.cancel_flags = self.context.RawArray('b', max(size + queue_depth, 1))
+        self.free_slots = list(range(size + queue_depth))
+        self.pending = 0
+        self.completed = 0
+        self.inline = 0
+        self.rejected = 0
+        self.abandoned = 0
+        self.stopped = 0
+        self.abandoned_finished = 0
+        self.lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                # spawn: the API process holds DB connections and threads that must not be forked
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=self.context,
+                    initializer=_init_worker,
+                    initargs=(self.cancel_flags,)
+                )
+                logger.info(f"Worker pool started with {self.size} processes")
+            return self.executor
+
+    def start(self):
+        """Start the workers ahead of the first request"""
+        if self.size > 0:
+            executor = self._get_executor()
+            # Workers are spawned on submit; one no-op each brings them all up now
+            for _ in range(self.size):
+                executor.submit(_warm_up)
+
+    async def run(self, fn: Callable, *args, size: int, deadline: Deadline):
+        """Run fn(*args, deadline) in a worker, or inline on a thread for small inputs"""
+        if self.size <= 0 or size < self.inline_size:
+            return await self._run_inline(fn, args, deadline)
+
+        with self.lock:
+            if not self.free_slots:
+                self.rejected += 1
+                raise WorkerPoolBusy()
+            slot = self.free_slots.pop()
+            self.pending += 1
+            self.cancel_flags[slot] = 0
+
+        # The copy sent to the worker watches the slot; the request's own deadline stays slot-free
+        task_deadline = copy.copy(deadline)
+        task_deadline.slot = slot
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args, task_deadline)
+        except BaseException:
+            self._release(slot)
+            raise
+        future.add_done_callback(lambda done: self._finished(slot, done))
+
+        def abandon():
+            self.cancel_flags[slot] = 1
+            future.cancel()
+
+        try:
+            return await self._wait(asyncio.wrap_future(future), deadline, abandon)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a hostile PDF); replace the pool for later calls
+            logger.error("Worker pool broken, restarting")
+            self._reset(executor)
+            raise
+
+    async def _run_inline(self, fn: Callable, args: tuple, deadline: Deadline):
+        with self.lock:
+            self.inline += 1
+        future = asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, deadline))
+
+        def finished(done):
+            self._count_outcome(done, deadline.cancelled)
+
+        future.add_done_callback(finished)
+        return await self._wait(future, deadline, deadline.cancel)
+
+    async def _wait(self, future: asyncio.Future, deadline: Deadline, abandon: Callable):
+        """Wait for a task within the deadline, abandoning it on timeout or cancellation"""
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), deadline.remaining())
+        except asyncio.TimeoutError:
+            if future.done():
+                # The task itself stopped at a deadline check
+                raise
+            self._abandon(future, abandon)
+            raise DeadlineExceeded("Request deadline exceeded")
+        except asyncio.CancelledError:
+            self._abandon(future, abandon)
+            raise
+
+    def _abandon(self, future: asyncio.Future, abandon: Callable):
+        with self.lock:
+            self.abandoned += 1
+        # Nobody awaits the result any more; retrieve it so asyncio does not log it
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        abandon()
+
+    def _count_outcome(self, future, was_abandoned: bool):
+        with self.lock:
+            if future.cancelled() or isinstance(future.exception(), DeadlineExceeded):
+                self.stopped += 1
+            elif was_abandoned:
+                self.abandoned_finished += 1
+
+    def _finished(self, slot: int, future):
+        self._count_outcome(future, bool(self.cancel_flags[slot]))
+        self._release(slot)
+        with self.lock:
+            self.completed += 1
+
+    def _release(self, slot: int):
+        with self.lock:
+            self.cancel_flags[slot] = 0
+            self.free_slots.append(slot)
+            self.pending -= 1
+
+    def _reset(self, executor: ProcessPoolExecutor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "size": self.size,
+                "queue_depth": self.queue_depth,
+                "pending": self.pending,
+                "completed": self.completed,
+                "inline": self.inline,
+                "rejected": self.rejected,
+                # Tasks whose caller timed out or disconnected, and what became of them
+                "abandoned": self.abandoned,
+                "stopped": self.stopped,
+                "abandoned_finished": self.abandoned_finished,
+            }
+
+
+def page_ranges(page_count: int, parts: int) -> List[Tuple[int, Optional[int]]]:
+    """Split pages into at most ``parts`` contiguous ranges; the last one is open-ended
+    in case the page tree undercounts"""
+    parts = max(1, min(parts, page_count))
+    bounds = [page_count * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1] if i + 1 < parts else None) for i in range(parts)]
+
+
+async def extract_pdf_text_parallel(pool: WorkerPool, source: PdfSource, size: int, page_count: int,
+                                    deadline: Deadline, page_budget: float) -> str:
+    """Extract a PDF's text with page ranges spread over the pool's workers.
+
+    Each range may take ``page_budget`` seconds per page, within the request's
+    deadline; a range that runs over is stopped and the extraction fails.
+    Pages are reassembled in order, so the text equals ``parse_pdf``'s.
+    """
+    ranges = page_ranges(page_count, pool.size)
+    tasks = [
+        asyncio.ensure_future(pool.run(
+            extract_pdf_pages, source, first, last, size=size,
+            deadline=deadline.narrowed(page_budget * max(1, (last or page_count) - first))
+        ))
+        for first, last in ranges
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        # One range failing abandons the others
+        for task in tasks:
+            task.cancel()
+    return "".join(join_pages(page for pages in results for page in pages))
+
+
+worker_pool = WorkerPool(
+    size=settings.worker_pool_size,
+    queue_depth=settings.worker_pool_queue_depth,
+    inline_size=settings.worker_pool_inline_size
+)